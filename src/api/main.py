@@ -1,17 +1,140 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from datetime import datetime
 
-from .models import BrandConfig, ReportRequest, ReportResponse
+from .models import (
+    BrandConfig,
+    ReportRequest,
+    ReportResponse,
+    METRICS_ADAPTER,
+    RECOMMENDATIONS_ADAPTER,
+)
 from .storage import storage
-from client_reports import render_docx, docx_to_pdf, PdfConversionError
+from client_reports import (
+    render_docx,
+    warm_templates,
+    docx_to_pdf,
+    PdfConversionError,
+    LibreOfficePool,
+    start_libreoffice_pool,
+    stop_libreoffice_pool,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Process pool for CPU-bound DOCX rendering, created by the lifespan handler
+_render_pool: ProcessPoolExecutor | None = None
+# Number of uvicorn worker processes sharing this machine
+_WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+# Render processes per uvicorn worker; by default the CPUs are shared out
+# among the WEB_CONCURRENCY workers instead of each worker taking them all
+RENDER_POOL_SIZE = int(
+    os.environ.get("CLIENT_REPORTS_RENDER_WORKERS", 0)
+) or max(1, (os.cpu_count() or 1) // _WEB_CONCURRENCY)
+# LibreOffice servers per uvicorn worker; four in total by default
+LIBREOFFICE_POOL_SIZE = int(
+    os.environ.get("CLIENT_REPORTS_LIBREOFFICE_SERVERS", 0)
+) or max(1, 4 // _WEB_CONCURRENCY)
+
+REPORT_DATE_FORMAT = "%B %d, %Y"
+# Default report date, kept current by the lifespan handler
+_report_date = datetime.now().strftime(REPORT_DATE_FORMAT)
+
+# Seconds between checks that the LibreOffice servers are still running
+LIBREOFFICE_HEALTH_INTERVAL = 10
+
+# Sequence for default report filenames; with the pid, unique across workers
+_report_seq = itertools.count()
+
+
+async def _refresh_report_date() -> None:
+    """Re-format the default report date once a second."""
+    global _report_date
+    while True:
+        await asyncio.sleep(1)
+        _report_date = datetime.now().strftime(REPORT_DATE_FORMAT)
+
+
+async def _watch_libreoffice(pool: LibreOfficePool) -> None:
+    """Periodically restart LibreOffice servers that have died."""
+    while True:
+        await asyncio.sleep(LIBREOFFICE_HEALTH_INTERVAL)
+        try:
+            await run_in_threadpool(pool.check_health)
+        except Exception:
+            # Keep watching; one bad check must not end the health loop
+            logger.exception("LibreOffice health check failed")
+
+
+def _new_render_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=RENDER_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warm_templates,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep LibreOffice servers and a render pool warm for the lifetime of the app."""
+    global _render_pool
+    libreoffice_pool = await run_in_threadpool(start_libreoffice_pool, LIBREOFFICE_POOL_SIZE)
+    background = []
+    if libreoffice_pool is not None:
+        background.append(asyncio.create_task(_watch_libreoffice(libreoffice_pool)))
+    _render_pool = _new_render_pool()
+    background.append(asyncio.create_task(_refresh_report_date()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        _render_pool.shutdown()
+        _render_pool = None
+        stop_libreoffice_pool()
+        storage.flush()
+
+
+async def _render(template_name: str, context: dict, output_name: str) -> Path:
+    """Render a DOCX off the event loop, in the process pool when available."""
+    global _render_pool
+    if _render_pool is None:
+        return await run_in_threadpool(render_docx, template_name, context, output_name)
+    loop = asyncio.get_running_loop()
+    pool = _render_pool
+    try:
+        return await loop.run_in_executor(pool, render_docx, template_name, context, output_name)
+    except BrokenProcessPool:
+        # A render process died (OOM, native crash); replace the pool once
+        # per breakage rather than failing every request until restart
+        if _render_pool is pool:
+            _render_pool = _new_render_pool()
+            pool.shutdown(wait=False)
+        return await loop.run_in_executor(
+            _render_pool, render_docx, template_name, context, output_name
+        )
+
 
 app = FastAPI(
     title="Client Report Engine API",
     description="Generate professional client reports from templates",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Static files directory
@@ -19,6 +142,14 @@ STATIC_DIR = Path(__file__).parent / "static"
 BRANDS_DIR = Path("brands")
 BRANDS_DIR.mkdir(exist_ok=True)
 
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class ReportFileResponse(FileResponse):
+    """FileResponse that streams in 1 MiB chunks instead of Starlette's 64 KiB."""
+    chunk_size = 1024 * 1024
+
 # Mount static files
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
@@ -34,18 +165,41 @@ def serve_frontend():
 
 # ============ Brand/Client Endpoints ============
 
+def _not_modified(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match already covers etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
 @app.get("/clients", response_model=list[BrandConfig])
-def list_clients():
+def list_clients(request: Request):
     """List all registered clients."""
-    return storage.get_all()
+    etag = f'W/"{storage.version}"'
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    # Pre-serialized per brand, so skip response_model validation and encoding
+    return Response(
+        content=storage.get_all_json(),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
 
 
 @app.get("/clients/{client_id}", response_model=BrandConfig)
-def get_client(client_id: str):
+def get_client(client_id: str, request: Request, response: Response):
     """Get a client by ID."""
+    # Read the version first: a racing upsert can then only pair a newer
+    # body with an older tag, never a stale body with the new one
+    etag = f'W/"{storage.version}"'
     brand = storage.get(client_id)
     if not brand:
         raise HTTPException(status_code=404, detail="Client not found")
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return brand
 
 
@@ -63,8 +217,37 @@ def delete_client(client_id: str):
     return {"message": "Client deleted", "client_id": client_id}
 
 
+def _sendfile(in_fd: int, out_fd: int) -> None:
+    """Copy a whole file between descriptors inside the kernel."""
+    size = os.fstat(in_fd).st_size
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+        if sent == 0:
+            break
+        offset += sent
+
+
+def _save_upload(src, dest: Path) -> None:
+    """Stream an uploaded file to disk without buffering it all in memory."""
+    src.seek(0)
+    with open(dest, "wb") as f:
+        # A SpooledTemporaryFile only has a real descriptor once rolled to
+        # disk (asking for fileno() earlier would force the rollover).
+        if hasattr(os, "sendfile") and getattr(src, "_rolled", True):
+            try:
+                src.flush()
+                _sendfile(src.fileno(), f.fileno())
+                return
+            except (OSError, ValueError):
+                src.seek(0)
+                f.seek(0)
+                f.truncate()
+        shutil.copyfileobj(src, f, length=UPLOAD_CHUNK_SIZE)
+
+
 @app.post("/clients/{client_id}/logo", response_model=BrandConfig)
-def upload_logo(client_id: str, file: UploadFile = File(...)):
+async def upload_logo(client_id: str, file: UploadFile = File(...)):
     """Upload a logo for a client."""
     if not storage.exists(client_id):
         raise HTTPException(status_code=404, detail="Client not found")
@@ -72,17 +255,16 @@ def upload_logo(client_id: str, file: UploadFile = File(...)):
     ext = Path(file.filename).suffix or ".png"
     logo_path = BRANDS_DIR / f"{client_id}_logo{ext}"
     
-    with open(logo_path, "wb") as f:
-        f.write(file.file.read())
+    await run_in_threadpool(_save_upload, file.file, logo_path)
     
-    brand = storage.update_logo(client_id, str(logo_path))
+    brand = await run_in_threadpool(storage.update_logo, client_id, str(logo_path))
     return brand
 
 
 # ============ Report Generation Endpoints ============
 
 @app.post("/reports/generate", response_model=ReportResponse)
-def generate_report(request: ReportRequest):
+async def generate_report(request: ReportRequest):
     """Generate a report for a client."""
     # Get client brand config
     brand = storage.get(request.client_id)
@@ -92,13 +274,13 @@ def generate_report(request: ReportRequest):
     # Build context from brand + request
     context = {
         "client_name": brand.display_name,
-        "report_date": request.report_date or datetime.now().strftime("%B %d, %Y"),
+        "report_date": request.report_date or _report_date,
         "report_period": request.report_period or "",
         "prepared_by": request.prepared_by or "",
         "executive_summary": request.executive_summary or "",
-        "metrics": [m.model_dump() for m in request.metrics],
+        "metrics": METRICS_ADAPTER.dump_python(request.metrics),
         "highlights": request.highlights,
-        "recommendations": [r.model_dump() for r in request.recommendations],
+        "recommendations": RECOMMENDATIONS_ADAPTER.dump_python(request.recommendations),
         "contact": request.contact.model_dump() if request.contact else {},
         # Brand styling context
         "brand": {
@@ -114,12 +296,14 @@ def generate_report(request: ReportRequest):
     # Generate output filename
     output_name = request.output_filename
     if not output_name:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_name = f"{request.client_id}_report_{timestamp}.docx"
+        output_name = (
+            f"{request.client_id}_report_{int(time.time())}"
+            f"_{os.getpid():x}_{next(_report_seq):x}.docx"
+        )
     
     # Render DOCX
     try:
-        docx_path = render_docx(request.template_name, context, output_name)
+        docx_path = await _render(request.template_name, context, output_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to render report: {e}")
     
@@ -127,7 +311,7 @@ def generate_report(request: ReportRequest):
     pdf_path = None
     if request.generate_pdf:
         try:
-            pdf_path = docx_to_pdf(docx_path)
+            pdf_path = await run_in_threadpool(docx_to_pdf, docx_path)
         except PdfConversionError as e:
             raise HTTPException(status_code=500, detail=f"PDF conversion failed: {e}")
     
@@ -141,35 +325,60 @@ def generate_report(request: ReportRequest):
 
 
 @app.get("/reports/download/{filename}")
-def download_report(filename: str):
+async def download_report(filename: str, request: Request):
     """Download a generated report file."""
     # Check in output directory
     from client_reports import OUTPUT_DIR
     
     file_path = OUTPUT_DIR / filename
-    if not file_path.exists():
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Report file not found")
     
+    # Callers may reuse a filename and re-render over it, so browsers must
+    # revalidate; the ETag turns an unchanged file into a bodyless 304
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    
     media_type = "application/pdf" if filename.endswith(".pdf") else \
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     
-    return FileResponse(
+    return ReportFileResponse(
         path=file_path,
         filename=filename,
         media_type=media_type,
+        headers=headers,
+        stat_result=stat,
     )
 
 
+# Seconds a templates directory listing is reused before rescanning
+TEMPLATES_CACHE_TTL = 5.0
+_templates_cache: tuple[float, list[str]] | None = None
+
+
 @app.get("/templates")
 def list_templates():
     """List available report templates."""
+    global _templates_cache
     from client_reports import TEMPLATE_DIR
     
-    templates = []
-    if TEMPLATE_DIR.exists():
-        templates = [f.name for f in TEMPLATE_DIR.glob("*.docx")]
+    now = time.monotonic()
+    if _templates_cache is None or now - _templates_cache[0] > TEMPLATES_CACHE_TTL:
+        templates = []
+        if TEMPLATE_DIR.exists():
+            # scandir entries carry the file type, so no stat per entry
+            with os.scandir(TEMPLATE_DIR) as entries:
+                templates = [
+                    e.name for e in entries
+                    if e.name.endswith(".docx") and not e.name.startswith(".") and e.is_file()
+                ]
+        _templates_cache = (now, templates)
     
-    return {"templates": templates}
+    return {"templates": _templates_cache[1]}
 
 
 # ============ Health Check ============
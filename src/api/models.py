@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, TypeAdapter
 from typing import Optional, Any
 from datetime import datetime
 
@@ -30,6 +30,11 @@ class RecommendationItem(BaseModel):
     description: str
 
 
+# Built once so their compiled serializers are reused for every report
+METRICS_ADAPTER = TypeAdapter(list[MetricItem])
+RECOMMENDATIONS_ADAPTER = TypeAdapter(list[RecommendationItem])
+
+
 class ContactInfo(BaseModel):
     name: str
     title: Optional[str] = None
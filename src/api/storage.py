@@ -3,97 +3,251 @@ Persistent storage for brand configurations.
 Uses JSON file storage for simplicity - can be swapped for a database.
 """
 
-import json
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
+
+import orjson
+
+try:  # advisory file locks are POSIX-only
+    import fcntl
+except ImportError:
+    fcntl = None
+
 from .models import BrandConfig
 
 
+logger = logging.getLogger(__name__)
+
+
 class BrandStorage:
-    """JSON file-based storage for brand configurations."""
+    """
+    JSON file-based storage for brand configurations.
+    
+    The in-memory cache serves all reads. With a non-zero flush_interval,
+    mutations mark the store dirty and are written out together at most
+    once per interval instead of rewriting the file on every change.
     
-    def __init__(self, storage_path: str | Path = "data/brands.json"):
+    Mutations and writes are serialized with a lock; reads are lock-free.
+    Files are replaced atomically, so readers never see a partial write.
+    
+    Several processes (e.g. uvicorn workers) can share one file: the cache
+    is reloaded whenever the file changes on disk, and writes hold an
+    exclusive lock on a sibling ".lock" file while they merge this
+    process's unwritten changes into the latest file contents.
+    """
+    
+    def __init__(self, storage_path: str | Path = "data/brands.json", flush_interval: float = 0.0):
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
         self._cache: dict[str, BrandConfig] = {}
+        # Serialized JSON per brand, kept in step with _cache
+        self._json_cache: dict[str, bytes] = {}
+        self._dirty = False
+        # Brands changed since the last write; None marks a deletion
+        self._pending: dict[str, BrandConfig | None] = {}
+        # Identity of the file contents the cache was loaded from or written as
+        self._stamp: tuple[int, int, int] | None = None
+        self._flush_timer: threading.Timer | None = None
+        self._lock = threading.RLock()
+        # Bumped on every mutation; the random prefix keeps versions from
+        # different processes or restarts from colliding
+        self._epoch = os.urandom(4).hex()
+        self._counter = 0
         self._load()
+        if flush_interval > 0:
+            atexit.register(self.flush)
     
     def _load(self) -> None:
         """Load brands from JSON file."""
-        if self.storage_path.exists():
-            try:
-                with open(self.storage_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                self._cache = {
-                    k: BrandConfig(**v) for k, v in data.items()
-                }
-            except (json.JSONDecodeError, Exception):
-                self._cache = {}
-        else:
+        self._cache = {}
+        self._stamp = None
+        try:
+            with open(self.storage_path, "rb") as f:
+                # Stat the open file so the stamp matches the bytes read
+                self._stamp = self._stamp_of(os.fstat(f.fileno()))
+                data = orjson.loads(f.read())
+            self._cache = {
+                k: BrandConfig(**v) for k, v in data.items()
+            }
+        except FileNotFoundError:
+            pass
+        except (orjson.JSONDecodeError, Exception):
             self._cache = {}
+        self._json_cache = {k: self._serialize(v) for k, v in self._cache.items()}
+    
+    @staticmethod
+    def _stamp_of(st: os.stat_result) -> tuple[int, int, int]:
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _refresh(self) -> None:
+        """Reload the cache if another process has rewritten the file."""
+        try:
+            stamp = self._stamp_of(os.stat(self.storage_path))
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            self._load()
+            # Changes not yet written by this process still win
+            for client_id, brand in self._pending.items():
+                if brand is None:
+                    self._cache.pop(client_id, None)
+                    self._json_cache.pop(client_id, None)
+                else:
+                    self._set(brand)
+            self._counter += 1
+    
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock shared by every process using this file."""
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.storage_path.with_name(self.storage_path.name + ".lock")
+        with open(lock_path, "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _serialize(brand: BrandConfig) -> bytes:
+        """Serialize a brand to JSON bytes."""
+        return orjson.dumps(brand.model_dump(mode="json"))
+    
+    def _set(self, brand: BrandConfig) -> None:
+        """Store a brand in the cache along with its serialized form."""
+        self._cache[brand.client_id] = brand
+        self._json_cache[brand.client_id] = self._serialize(brand)
+    
+    @property
+    def version(self) -> str:
+        """Opaque token that changes whenever the stored brands change."""
+        self._refresh()
+        return f"{self._epoch}-{self._counter}"
     
     def _save(self) -> None:
-        """Persist brands to JSON file."""
-        data = {k: v.model_dump(mode="json") for k, v in self._cache.items()}
-        with open(self.storage_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str)
+        """Persist brands, coalescing writes made within flush_interval."""
+        self._counter += 1
+        if self.flush_interval <= 0:
+            self._write()
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> None:
+        """Write any pending changes to disk now."""
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            if self._dirty:
+                try:
+                    self._write()
+                except OSError:
+                    # Stay dirty so the next flush (or shutdown) retries
+                    logger.exception("Could not write %s", self.storage_path)
+                    return
+                self._dirty = False
+    
+    def _write(self) -> None:
+        """Write brands to JSON file, replacing the old file atomically."""
+        with self._lock, self._file_lock():
+            # Merge in brands other processes wrote since our last read
+            self._refresh()
+            # Reuse the per-brand JSON rather than dumping every model again
+            body = b",".join(orjson.dumps(k) + b":" + v for k, v in self._json_cache.items())
+            tmp_path = self.storage_path.with_name(self.storage_path.name + ".tmp")
+            tmp_path.write_bytes(b"{" + body + b"}")
+            os.replace(tmp_path, self.storage_path)
+            self._stamp = self._stamp_of(os.stat(self.storage_path))
+            self._pending.clear()
     
     def get(self, client_id: str) -> Optional[BrandConfig]:
         """Get a brand by client_id."""
+        self._refresh()
         return self._cache.get(client_id)
     
     def get_all(self) -> list[BrandConfig]:
         """Get all brands."""
+        self._refresh()
         return list(self._cache.values())
     
+    def get_all_json(self) -> bytes:
+        """Get all brands as a serialized JSON array."""
+        self._refresh()
+        return b"[" + b",".join(list(self._json_cache.values())) + b"]"
+    
     def upsert(self, brand: BrandConfig) -> BrandConfig:
         """Create or update a brand configuration."""
-        now = datetime.utcnow()
-        
-        existing = self._cache.get(brand.client_id)
-        if existing:
-            # Update: preserve created_at, update updated_at
-            brand = brand.model_copy(update={
-                "created_at": existing.created_at,
-                "updated_at": now,
-            })
-        else:
-            # Create: set both timestamps
-            brand = brand.model_copy(update={
-                "created_at": now,
-                "updated_at": now,
-            })
-        
-        self._cache[brand.client_id] = brand
-        self._save()
+        with self._lock:
+            self._refresh()
+            now = datetime.utcnow()
+            
+            existing = self._cache.get(brand.client_id)
+            if existing:
+                # Update: preserve created_at, update updated_at
+                brand = brand.model_copy(update={
+                    "created_at": existing.created_at,
+                    "updated_at": now,
+                })
+            else:
+                # Create: set both timestamps
+                brand = brand.model_copy(update={
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            
+            self._set(brand)
+            self._pending[brand.client_id] = brand
+            self._save()
         return brand
     
     def update_logo(self, client_id: str, logo_path: str) -> Optional[BrandConfig]:
         """Update the logo path for a client."""
-        brand = self._cache.get(client_id)
-        if brand:
-            brand = brand.model_copy(update={
-                "logo_path": logo_path,
-                "updated_at": datetime.utcnow(),
-            })
-            self._cache[client_id] = brand
-            self._save()
+        with self._lock:
+            self._refresh()
+            brand = self._cache.get(client_id)
+            if brand:
+                brand = brand.model_copy(update={
+                    "logo_path": logo_path,
+                    "updated_at": datetime.utcnow(),
+                })
+                self._set(brand)
+                self._pending[client_id] = brand
+                self._save()
         return brand
     
     def delete(self, client_id: str) -> bool:
         """Delete a brand configuration."""
-        if client_id in self._cache:
-            del self._cache[client_id]
-            self._save()
-            return True
+        with self._lock:
+            self._refresh()
+            if client_id in self._cache:
+                del self._cache[client_id]
+                del self._json_cache[client_id]
+                self._pending[client_id] = None
+                self._save()
+                return True
         return False
     
     def exists(self, client_id: str) -> bool:
         """Check if a client exists."""
+        self._refresh()
         return client_id in self._cache
 
 
 # Global storage instance
-storage = BrandStorage()
+storage = BrandStorage(flush_interval=0.5)
 
@@ -2,17 +2,49 @@
 Client Report Engine - Generate professional reports from templates.
 """
 
-from .renderer import render_docx, TEMPLATE_DIR, OUTPUT_DIR
-from .pdf import docx_to_pdf, PdfConversionError
+from .renderer import (
+    render_docx,
+    render_docx_to_bytes,
+    warm_templates,
+    IncrementalRenderer,
+    TEMPLATE_DIR,
+    OUTPUT_DIR,
+)
+from .pdf import (
+    docx_to_pdf,
+    docx_bytes_to_pdf,
+    render_and_convert_pdf,
+    docx_to_pdf_batch,
+    docx_to_pdf_parallel,
+    PdfConversionError,
+    LibreOfficeServer,
+    LibreOfficePool,
+    start_libreoffice_pool,
+    stop_libreoffice_pool,
+)
+from .jsonio import loads, dumps
 from .cli import main
 
 __version__ = "1.0.0"
 __all__ = [
     "render_docx",
+    "render_docx_to_bytes",
+    "warm_templates",
+    "IncrementalRenderer",
     "docx_to_pdf",
+    "docx_bytes_to_pdf",
+    "render_and_convert_pdf",
+    "docx_to_pdf_batch",
+    "docx_to_pdf_parallel",
     "PdfConversionError",
+    "LibreOfficeServer",
+    "LibreOfficePool",
+    "start_libreoffice_pool",
+    "stop_libreoffice_pool",
     "TEMPLATE_DIR",
     "OUTPUT_DIR",
+    "loads",
+    "dumps",
     "main",
 ]
 
@@ -1,21 +1,41 @@
 import argparse
-import json
 from pathlib import Path
 
+from .jsonio import loads
 from .renderer import render_docx
-from .pdf import docx_to_pdf
+from .pdf import docx_to_pdf, docx_to_pdf_batch
+
+
+def _batch_output_name(template: str, docx_out: str | None, index: int) -> str:
+    """Output filename for the index-th report of a batch."""
+    base = Path(docx_out or template.replace(".docx", "_rendered.docx"))
+    return f"{base.stem}_{index}{base.suffix or '.docx'}"
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate client reports from templates.")
     parser.add_argument("--template", required=True, help="Template DOCX file name, e.g. sample_report.docx")
-    parser.add_argument("--data", required=True, help="JSON file with context data")
+    parser.add_argument("--data", required=True, help="JSON file with context data (an array renders one report per item)")
     parser.add_argument("--docx-out", help="Output DOCX filename")
     parser.add_argument("--pdf", action="store_true", help="Also convert to PDF")
     args = parser.parse_args()
 
-    with open(args.data, "r", encoding="utf-8") as f:
-        context = json.load(f)
+    # One read of the raw bytes, parsed without decoding to str first
+    with open(args.data, "rb") as f:
+        context = loads(f.read())
+
+    if isinstance(context, list):
+        docx_paths = [
+            render_docx(args.template, item, _batch_output_name(args.template, args.docx_out, i))
+            for i, item in enumerate(context, start=1)
+        ]
+        if args.pdf and docx_paths:
+            for pdf_path in docx_to_pdf_batch(docx_paths, docx_paths[0].parent):
+                print(f"PDF generated at: {pdf_path}")
+        else:
+            for docx_path in docx_paths:
+                print(f"DOCX generated at: {docx_path}")
+        return
 
     docx_path = render_docx(args.template, context, args.docx_out)
 
@@ -0,0 +1,30 @@
+"""
+JSON parsing and serialization, using orjson when it is installed.
+"""
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+    import json
+
+
+if orjson is not None:
+
+    def loads(data: bytes | str):
+        """Parse a JSON document from bytes or str."""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        """Serialize obj to a compact JSON string."""
+        return orjson.dumps(obj).decode()
+
+else:
+
+    def loads(data: bytes | str):
+        """Parse a JSON document from bytes or str."""
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        """Serialize obj to a compact JSON string."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
@@ -1,30 +1,374 @@
+import errno
+import functools
+import hashlib
+import multiprocessing
+import multiprocessing.util
+import os
 import sys
 import subprocess
 import shutil
+import logging
+import queue
+import socket
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+from .renderer import render_docx_to_bytes
+
+try:  # pyuno ships with LibreOffice itself, not with PyPI
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+except ImportError:
+    uno = None
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds allowed per file before a soffice invocation is considered hung
+SOFFICE_TIMEOUT = 60
+
+# Ports tried by a LibreOfficeServer that picks its own before giving up
+START_ATTEMPTS = 3
+
+# Number of files handed to a single soffice invocation in batch mode
+BATCH_SIZE = 10
+
+# Content-addressed store of converted PDFs, see docx_to_pdf(cache=True)
+PDF_CACHE_DIR = Path(
+    os.environ.get("CLIENT_REPORTS_CACHE_DIR", Path.home() / ".cache" / "client_reports")
+)
+PDF_CACHE_MAX_ENTRIES = 256
+
+# RAM-backed directory soffice writes into before the PDF is moved into place
+_SHM_DIR = Path("/dev/shm")
+
 
 class PdfConversionError(RuntimeError):
     pass
 
 
-def _convert_with_libreoffice(docx_path: Path, output_dir: Path) -> Path:
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(output_dir),
-            str(docx_path),
-        ],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
+@functools.cache
+def _find_soffice() -> str | None:
+    """Locate the LibreOffice binary, scanning PATH only once per process."""
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def _free_port(host: str) -> int:
+    """Ask the OS for a currently unused TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _prop(name: str, value) -> "PropertyValue":
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class LibreOfficeServer:
+    """
+    A long-lived headless soffice instance driven over a UNO socket.
+
+    Keeping one process around avoids paying LibreOffice's cold start on
+    every conversion. A single soffice instance is not safe to drive from
+    several threads at once, so conversions are serialized with a lock.
+
+    Only one soffice may run per user profile (a second one hands its work
+    to the first and exits early), so every server gets its own profile
+    directory. When no port is given a free one is picked, which keeps
+    servers started by different worker processes apart.
+    """
+
+    def __init__(
+        self,
+        port: int | None = None,
+        host: str = "127.0.0.1",
+        profile_dir: str | Path | None = None,
+    ):
+        # A picked port can be taken before soffice binds it; only then retry
+        self._pick_port = port is None
+        if port is None:
+            port = _free_port(host)
+        self.port = port
+        self.host = host
+        if profile_dir is None:
+            # Unique per server, independent of the (reusable) port number
+            profile_dir = tempfile.mkdtemp(prefix="lo_profile_")
+        self.profile_dir = Path(profile_dir)
+        self._process: subprocess.Popen | None = None
+        self._desktop = None
+        self._lock = threading.Lock()
+
+    @property
+    def uno_url(self) -> str:
+        return f"socket,host={self.host},port={self.port};urp;"
+
+    def start(self, timeout: float = 30.0) -> None:
+        """Launch soffice and wait until it accepts UNO connections."""
+        if uno is None:
+            raise PdfConversionError("pyuno is not available")
+
+        for attempt in range(1, START_ATTEMPTS + 1):
+            try:
+                self._launch(timeout)
+                return
+            except PdfConversionError as exc:
+                if not self._pick_port or attempt == START_ATTEMPTS:
+                    raise
+                logger.warning(
+                    "LibreOffice failed to start on port %s (%s), retrying on another port",
+                    self.port, exc,
+                )
+                self.port = _free_port(self.host)
+
+    def _launch(self, timeout: float) -> None:
+        self._process = subprocess.Popen(
+            [
+                _find_soffice() or "soffice",
+                "--headless",
+                f"--accept={self.uno_url}",
+                "--norestore",
+                "--nologo",
+                "--nodefault",
+                f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self._desktop = self._connect(timeout)
+        except Exception:
+            self.stop()
+            raise
+
+    def is_alive(self) -> bool:
+        """Check whether the soffice process is still running."""
+        return self._process is not None and self._process.poll() is None
+
+    def restart(self, timeout: float = 30.0) -> None:
+        """Replace a dead soffice process, waiting for any conversion in flight."""
+        with self._lock:
+            self.stop()
+            self.start(timeout)
+
+    def _connect(self, timeout: float):
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:{self.uno_url}StarOffice.ComponentContext")
+                break
+            except NoConnectException:
+                if self._process.poll() is not None:
+                    raise PdfConversionError("LibreOffice exited during startup")
+                if time.monotonic() > deadline:
+                    raise PdfConversionError("Timed out waiting for LibreOffice to start")
+                time.sleep(0.1)
+        return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+    def convert(self, docx_path: Path, output_dir: Path) -> Path:
+        """Convert a DOCX file to PDF inside the running soffice instance."""
+        if self._desktop is None:
+            raise PdfConversionError("LibreOffice server is not running")
+
+        pdf_path = output_dir / (docx_path.stem + ".pdf")
+        with self._lock:
+            try:
+                doc = self._desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(str(docx_path)),
+                    "_blank",
+                    0,
+                    (_prop("Hidden", True),),
+                )
+                if doc is None:
+                    raise PdfConversionError(f"LibreOffice could not open {docx_path}")
+                try:
+                    doc.storeToURL(
+                        uno.systemPathToFileUrl(str(pdf_path)),
+                        (_prop("FilterName", "writer_pdf_Export"),),
+                    )
+                finally:
+                    doc.close(True)
+            except PdfConversionError:
+                raise
+            except Exception as exc:
+                raise PdfConversionError(f"LibreOffice failed: {exc}") from exc
+        return pdf_path
+
+    def convert_many(self, docx_paths: list[Path], output_dir: Path) -> list[Path]:
+        """Convert several DOCX files through this one soffice instance."""
+        return [self.convert(p, output_dir) for p in docx_paths]
+
+    def __enter__(self) -> "LibreOfficeServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        """Shut down the soffice process."""
+        if self._desktop is not None:
+            try:
+                self._desktop.terminate()
+            except Exception:
+                pass
+            self._desktop = None
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+
+
+class LibreOfficePool:
+    """
+    A fixed set of LibreOffice servers handed out one conversion at a time.
+
+    Each server has its own profile and port, so up to `size` conversions
+    run in parallel; further callers wait up to `timeout` seconds for a
+    server to become free. A hung soffice keeps its process alive, so the
+    health check cannot catch it; the timeout makes callers fail instead
+    of blocking behind it forever.
+    """
+
+    def __init__(self, size: int = 4, timeout: float = SOFFICE_TIMEOUT):
+        self.servers = [LibreOfficeServer() for _ in range(size)]
+        self.timeout = timeout
+        self._idle: queue.Queue[LibreOfficeServer] = queue.Queue()
+
+    def start(self, timeout: float = 30.0) -> None:
+        """Start every server in the pool."""
+        try:
+            for server in self.servers:
+                server.start(timeout)
+                self._idle.put(server)
+        except Exception:
+            self.stop()
+            raise
+
+    def convert(self, docx_path: Path, output_dir: Path) -> Path:
+        """Convert a DOCX file on the next free server."""
+        try:
+            server = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PdfConversionError(
+                f"No LibreOffice server became free within {self.timeout}s"
+            ) from None
+        try:
+            return server.convert(docx_path, output_dir)
+        finally:
+            self._idle.put(server)
+
+    def check_health(self) -> None:
+        """Restart any server whose soffice process has died."""
+        for server in self.servers:
+            if server.is_alive():
+                continue
+            logger.warning("LibreOffice on port %s died, restarting", server.port)
+            try:
+                server.restart()
+            except Exception as exc:
+                logger.warning("Could not restart LibreOffice on port %s: %s", server.port, exc)
+
+    def stop(self) -> None:
+        """Stop every server in the pool."""
+        for server in self.servers:
+            server.stop()
+
+
+# Pool used by _convert_with_libreoffice when one has been started
+_pool: LibreOfficePool | None = None
+
+
+def start_libreoffice_pool(size: int = 4) -> LibreOfficePool | None:
+    """
+    Start the shared pool of LibreOffice servers.
+
+    Returns None (and conversions keep spawning soffice per call) when pyuno
+    or soffice is unavailable, or the servers fail to come up.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    if uno is None or not _find_soffice():
+        return None
+
+    pool = LibreOfficePool(size)
+    try:
+        pool.start()
+    except Exception as exc:
+        logger.warning("Could not start LibreOffice pool: %s", exc)
+        return None
+    _pool = pool
+    return pool
+
+
+def stop_libreoffice_pool() -> None:
+    """Stop the shared LibreOffice pool if one is running."""
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
+
+
+def _run_libreoffice(
+    docx_paths: list[Path], output_dir: Path, profile_dir: Path | None = None
+) -> None:
+    """
+    Convert one or more DOCX files with a single soffice invocation.
+
+    Concurrent invocations must each pass their own profile_dir: a second
+    soffice on a shared profile hands its work to the first and exits.
+    """
+    profile = [f"-env:UserInstallation={profile_dir.resolve().as_uri()}"] if profile_dir else []
+    try:
+        result = subprocess.run(
+            [
+                _find_soffice() or "soffice",
+                "--headless",
+                *profile,
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(output_dir),
+                *map(str, docx_paths),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=1 << 20,
+            timeout=SOFFICE_TIMEOUT * len(docx_paths),
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise PdfConversionError(f"LibreOffice timed out after {exc.timeout}s") from exc
     if result.returncode != 0:
-        raise PdfConversionError(f"LibreOffice failed: {result.stderr}")
+        stderr = result.stderr.decode(errors="replace")
+        raise PdfConversionError(f"LibreOffice failed: {stderr}")
+
+
+def _convert_with_libreoffice(
+    docx_path: Path, output_dir: Path, server: LibreOfficeServer | None = None
+) -> Path:
+    if server is not None:
+        return server.convert(docx_path, output_dir)
+    if _pool is not None:
+        return _pool.convert(docx_path, output_dir)
+
+    _run_libreoffice([docx_path], output_dir)
     return output_dir / (docx_path.stem + ".pdf")
 
 
@@ -40,11 +384,135 @@ def _convert_with_docx2pdf(docx_path: Path, pdf_path: Path) -> Path:
     return pdf_path
 
 
-def docx_to_pdf(input_path: str | Path, output_path: str | Path | None = None) -> Path:
+def _docx_digest(docx_path: Path) -> str:
+    """
+    Hash the content of a DOCX file for the PDF cache.
+
+    A DOCX is a zip whose entries carry write timestamps, so two renders of
+    the same template and context differ byte for byte. Hashing the entry
+    names and contents instead keeps identical documents on one key.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def field(data: bytes) -> None:
+        # Length-prefix every field so distinct entry lists cannot collide
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+
+    try:
+        with zipfile.ZipFile(docx_path) as zf:
+            digest.update(b"zip")
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                field(info.filename.encode())
+                field(zf.read(info))
+    except zipfile.BadZipFile:
+        digest.update(b"raw")
+        field(docx_path.read_bytes())
+    return digest.hexdigest()
+
+
+def _cache_store(key: str, pdf_path: Path) -> None:
+    """Copy a converted PDF into the cache, evicting the least recently used entries."""
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        entry = PDF_CACHE_DIR / f"{key}.pdf"
+        # A fresh name per call: threads storing the same key must not share it
+        fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst, open(pdf_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp, entry)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        entries = list(PDF_CACHE_DIR.glob("*.pdf"))
+        if len(entries) > PDF_CACHE_MAX_ENTRIES:
+            entries.sort(key=lambda p: p.stat().st_mtime_ns)
+            for stale in entries[:len(entries) - PDF_CACHE_MAX_ENTRIES]:
+                stale.unlink(missing_ok=True)
+    except OSError as exc:
+        logger.warning("Could not cache %s: %s", pdf_path, exc)
+
+
+def _cache_fetch(key: str, pdf_path: Path) -> bool:
+    """Copy a cached PDF to pdf_path; returns False on a cache miss."""
+    entry = PDF_CACHE_DIR / f"{key}.pdf"
+    try:
+        shutil.copyfile(entry, pdf_path)
+    except FileNotFoundError:
+        return False
+    # Refresh the mtime so eviction drops the least recently used entries
+    try:
+        os.utime(entry)
+    except FileNotFoundError:
+        # Evicted by a concurrent store after the copy; the copy is still good
+        pass
+    return True
+
+
+def _scratch_root() -> str | None:
+    """Directory for short-lived conversion files: tmpfs when available, else the temp dir."""
+    if _SHM_DIR.is_dir() and os.access(_SHM_DIR, os.W_OK):
+        return str(_SHM_DIR)
+    return None
+
+
+def _staging_dir() -> Path:
+    """Create a private directory for soffice output, on tmpfs when available."""
+    return Path(tempfile.mkdtemp(prefix=f"client_reports_{os.getpid()}_", dir=_scratch_root()))
+
+
+def _move_into_place(src: Path, dest: Path) -> None:
+    """Move src to dest atomically, copying first when they are on different filesystems."""
+    try:
+        os.replace(src, dest)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        part = dest.with_name(dest.name + ".part")
+        shutil.copyfile(src, part)
+        os.replace(part, dest)
+
+
+def _convert(docx_path: Path, pdf_path: Path) -> Path:
+    # Prefer LibreOffice if present on PATH
+    if _find_soffice():
+        # soffice writes into a staging directory; the finished PDF lands in
+        # the destination with a single rename (or one copy across filesystems)
+        staging = _staging_dir()
+        try:
+            staged = _convert_with_libreoffice(docx_path, staging)
+            # soffice exits 0 without writing anything when it cannot load the file
+            if not staged.exists():
+                raise PdfConversionError(f"LibreOffice produced no output for {docx_path.name}")
+            _move_into_place(staged, pdf_path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return pdf_path
+
+    # Fallback: docx2pdf (typically requires Word on Windows/macOS)
+    if sys.platform in {"win32", "darwin"}:
+        return _convert_with_docx2pdf(docx_path, pdf_path)
+
+    raise PdfConversionError(
+        "No PDF backend found. Install LibreOffice (soffice on PATH) or docx2pdf."
+    )
+
+
+def docx_to_pdf(
+    input_path: str | Path,
+    output_path: str | Path | None = None,
+    *,
+    cache: bool = True,
+) -> Path:
     """
     Cross-platform DOCX → PDF conversion.
 
     Prefers LibreOffice (soffice) if available; otherwise uses docx2pdf on Windows/macOS.
+    With cache enabled, PDFs are kept under PDF_CACHE_DIR keyed by the
+    document's content, and converting an identical document again copies
+    the cached PDF instead of running the backend.
     """
     docx_path = Path(input_path).resolve()
     if output_path is None:
@@ -55,14 +523,165 @@ def docx_to_pdf(input_path: str | Path, output_path: str | Path | None = None) -
     output_dir = pdf_path.parent
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Prefer LibreOffice if present on PATH
-    if shutil.which("soffice"):
-        return _convert_with_libreoffice(docx_path, output_dir)
+    if not cache:
+        return _convert(docx_path, pdf_path)
 
-    # Fallback: docx2pdf (typically requires Word on Windows/macOS)
-    if sys.platform in {"win32", "darwin"}:
-        return _convert_with_docx2pdf(docx_path, pdf_path)
+    key = _docx_digest(docx_path)
+    if _cache_fetch(key, pdf_path):
+        return pdf_path
 
-    raise PdfConversionError(
-        "No PDF backend found. Install LibreOffice (soffice on PATH) or docx2pdf."
+    result = _convert(docx_path, pdf_path)
+    _cache_store(key, result)
+    return result
+
+
+def docx_bytes_to_pdf(
+    docx_bytes: bytes, output_path: str | Path, *, cache: bool = True
+) -> Path:
+    """
+    Convert an in-memory DOCX document to PDF at output_path.
+
+    The bytes are written once to a temporary file (on tmpfs when
+    available) for soffice to read, and removed after conversion.
+    """
+    with tempfile.NamedTemporaryFile(
+        suffix=".docx", dir=_scratch_root(), delete=False
+    ) as f:
+        f.write(docx_bytes)
+    try:
+        return docx_to_pdf(f.name, output_path, cache=cache)
+    finally:
+        os.unlink(f.name)
+
+
+def render_and_convert_pdf(
+    template_name: str, context: dict, output_path: str | Path, *, cache: bool = True
+) -> Path:
+    """
+    Render a report straight to PDF without writing the DOCX to OUTPUT_DIR.
+    """
+    return docx_bytes_to_pdf(render_docx_to_bytes(template_name, context), output_path, cache=cache)
+
+
+def docx_to_pdf_batch(input_paths: list[str | Path], output_dir: str | Path) -> list[Path]:
+    """
+    Convert several DOCX files to PDF in output_dir.
+
+    With LibreOffice, all files go through one soffice: the running pool,
+    else a temporary UNO server when pyuno is available, else soffice
+    invocations of BATCH_SIZE files each. Start-up is paid once, not once
+    per file. A failing batch is retried file by file so the error names
+    the offending document. Returns the PDF paths in input order.
+    """
+    docx_paths = [Path(p).resolve() for p in input_paths]
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if _pool is not None:
+        return [_pool.convert(p, output_dir) for p in docx_paths]
+
+    if not _find_soffice():
+        return [docx_to_pdf(p, output_dir / (p.stem + ".pdf")) for p in docx_paths]
+
+    if uno is not None:
+        server = LibreOfficeServer()
+        try:
+            server.start()
+        except PdfConversionError as exc:
+            logger.warning("Could not start LibreOffice server, using soffice batches: %s", exc)
+        else:
+            try:
+                return server.convert_many(docx_paths, output_dir)
+            finally:
+                server.stop()
+
+    for start in range(0, len(docx_paths), BATCH_SIZE):
+        batch = docx_paths[start:start + BATCH_SIZE]
+        try:
+            _run_libreoffice(batch, output_dir)
+        except PdfConversionError:
+            if len(batch) == 1:
+                raise
+            # Convert one file at a time to pin the failure on its document
+            for docx_path in batch:
+                try:
+                    _run_libreoffice([docx_path], output_dir)
+                except PdfConversionError as exc:
+                    raise PdfConversionError(f"{docx_path.name}: {exc}") from exc
+    return [output_dir / (p.stem + ".pdf") for p in docx_paths]
+
+
+# soffice owned by the current docx_to_pdf_parallel worker process
+_worker_server: LibreOfficeServer | None = None
+# Profile for per-file soffice runs in a worker without its own server
+_worker_profile: Path | None = None
+
+
+def _start_soffice_server() -> None:
+    """ProcessPoolExecutor initializer: give this worker its own soffice."""
+    global _worker_server, _worker_profile
+    if uno is not None:
+        server = LibreOfficeServer()
+        try:
+            server.start()
+        except PdfConversionError as exc:
+            logger.warning("Could not start LibreOffice server in worker: %s", exc)
+        else:
+            # Pool workers leave via os._exit, so atexit hooks would never run
+            multiprocessing.util.Finalize(server, server.stop, exitpriority=10)
+            _worker_server = server
+            return
+    _worker_profile = Path(tempfile.mkdtemp(prefix="lo_profile_"))
+    multiprocessing.util.Finalize(
+        None, shutil.rmtree, args=(_worker_profile,), kwargs={"ignore_errors": True},
+        exitpriority=10,
     )
+
+
+def _convert_one(docx_path: Path, output_dir: Path) -> Path:
+    """Convert one file in a docx_to_pdf_parallel worker."""
+    if _worker_server is not None:
+        return _worker_server.convert(docx_path, output_dir)
+    _run_libreoffice([docx_path], output_dir, _worker_profile)
+    pdf_path = output_dir / (docx_path.stem + ".pdf")
+    if not pdf_path.exists():
+        raise PdfConversionError(f"LibreOffice produced no output for {docx_path.name}")
+    return pdf_path
+
+
+def docx_to_pdf_parallel(
+    input_paths: list[str | Path],
+    output_dir: str | Path,
+    max_workers: int | None = None,
+) -> list[Path]:
+    """
+    Convert several DOCX files to PDF in output_dir across worker processes.
+
+    soffice is not thread-safe within one process, so the work is spread
+    over processes instead: each worker starts its own LibreOffice server
+    on a unique port and profile and keeps it for every file it converts.
+    Without pyuno the workers fall back to one soffice invocation per file,
+    each worker on its own profile.
+    max_workers defaults to half the CPU count. Returns the PDF paths in
+    input order.
+    """
+    docx_paths = [Path(p).resolve() for p in input_paths]
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if not _find_soffice():
+        return [docx_to_pdf(p, output_dir / (p.stem + ".pdf")) for p in docx_paths]
+
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) // 2)
+    max_workers = min(max_workers, len(docx_paths)) or 1
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_start_soffice_server,
+        ) as executor:
+            return list(executor.map(_convert_one, docx_paths, [output_dir] * len(docx_paths)))
+    except BrokenProcessPool as exc:
+        raise PdfConversionError(f"LibreOffice worker process failed: {exc}") from exc
@@ -1,24 +1,197 @@
+import copy
+import io
+import logging
+import mmap
+import os
+from functools import lru_cache
 from pathlib import Path
 from docxtpl import DocxTemplate
+from jinja2 import Environment
 
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 TEMPLATE_DIR = BASE_DIR / "reports" / "templates"
 OUTPUT_DIR = BASE_DIR / "reports" / "output"
 
+# Outputs at least this large bypass the page cache (O_DIRECT) where supported
+DIRECT_IO_THRESHOLD = 1024 * 1024
+# Size of the page-aligned staging buffer used for O_DIRECT writes, rounded
+# up to a whole number of pages; override with CLIENT_REPORTS_WRITE_BUF
+_write_buf = int(os.environ.get("CLIENT_REPORTS_WRITE_BUF", 1024 * 1024))
+DIRECT_IO_BLOCK = max(1, -(-_write_buf // mmap.PAGESIZE)) * mmap.PAGESIZE
+
+# Directories already created by this process
+_DIR_READY: set[Path] = set()
+
+
+class _CompiledTemplateEnvironment(Environment):
+    """
+    Jinja environment that reuses compiled templates for identical sources.
+
+    docxtpl compiles each document part with from_string(), which bypasses
+    Jinja's loader and bytecode caches. The patched XML of a given template
+    is the same on every render, so caching on the source string skips the
+    lex/parse/compile step after the first render.
+    """
+
+    def __init__(self, *args, cache_size: int = 128, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compile_cached = lru_cache(maxsize=cache_size)(super().from_string)
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is None and template_class is None and isinstance(source, str):
+            return self._compile_cached(source)
+        return super().from_string(source, globals, template_class)
+
+
+# Shared by every render so compiled document parts are reused
+_JINJA_ENV = _CompiledTemplateEnvironment()
+
+
+@lru_cache(maxsize=32)
+def _load_template(path: str, mtime_ns: int) -> DocxTemplate:
+    """
+    Parse a template once per (path, mtime) so edits are picked up.
+
+    The cached template is a prototype: DocxTemplate mutates itself when
+    rendering, so each render works on a copy from _copy_template().
+    """
+    template = DocxTemplate(io.BytesIO(Path(path).read_bytes()))
+    template.init_docx()
+    return template
+
+
+def _copy_template(prototype: DocxTemplate) -> DocxTemplate:
+    """
+    Make a render-ready copy of a parsed template.
+
+    DocxTemplate forwards unknown attributes to its document, which breaks
+    copy.deepcopy, so the copy shares the prototype's settings and gets a
+    deep copy of just the parsed document (cheaper than re-parsing the zip).
+    """
+    template = DocxTemplate.__new__(DocxTemplate)
+    template.__dict__.update(prototype.__dict__)
+    template.reset_replacements()
+    template.docx = copy.deepcopy(prototype.docx)
+    return template
+
+
+def _write_direct(path: Path, data: bytes) -> None:
+    """Write data with O_DIRECT through a page-aligned buffer."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+    try:
+        # Anonymous mmaps are page-aligned, as O_DIRECT requires
+        with mmap.mmap(-1, DIRECT_IO_BLOCK) as buf, memoryview(buf) as view:
+            for offset in range(0, len(data), DIRECT_IO_BLOCK):
+                chunk = data[offset:offset + DIRECT_IO_BLOCK]
+                view[:len(chunk)] = chunk
+                # Lengths must be block multiples too: pad the tail, truncate below
+                size = -(-len(chunk) // mmap.PAGESIZE) * mmap.PAGESIZE
+                if os.write(fd, view[:size]) != size:
+                    raise OSError("short O_DIRECT write")
+        os.ftruncate(fd, len(data))
+    finally:
+        os.close(fd)
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create path once per process instead of on every render."""
+    if path not in _DIR_READY:
+        path.mkdir(parents=True, exist_ok=True)
+        _DIR_READY.add(path)
+
+
+def _write_output(path: Path, data: bytes) -> None:
+    """Write rendered bytes to disk, recreating a directory removed since it was made."""
+    try:
+        _write_file(path, data)
+    except FileNotFoundError:
+        _DIR_READY.discard(path.parent)
+        _ensure_dir(path.parent)
+        _write_file(path, data)
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write rendered bytes to disk, bypassing the page cache for large files."""
+    if len(data) >= DIRECT_IO_THRESHOLD and hasattr(os, "O_DIRECT"):
+        try:
+            _write_direct(path, data)
+            return
+        except OSError:
+            # e.g. tmpfs or other filesystems without O_DIRECT support
+            pass
+    path.write_bytes(data)
+
+
+def render_docx_to_bytes(template_name: str, context: dict) -> bytes:
+    """
+    Render a DOCX report in memory and return the document bytes.
+    """
+    template_path = TEMPLATE_DIR / template_name
+    prototype = _load_template(str(template_path), template_path.stat().st_mtime_ns)
+    doc = _copy_template(prototype)
+    doc.render(context, jinja_env=_JINJA_ENV)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
 
 def render_docx(template_name: str, context: dict, output_name: str | None = None) -> Path:
     """
     Render a DOCX report from a template and context data.
     """
-    template_path = TEMPLATE_DIR / template_name
     if output_name is None:
         output_name = template_name.replace(".docx", "_rendered.docx")
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(OUTPUT_DIR)
     output_path = OUTPUT_DIR / output_name
 
-    doc = DocxTemplate(template_path)
-    doc.render(context)
-    doc.save(output_path)
+    _write_output(output_path, render_docx_to_bytes(template_name, context))
     return output_path
+
+
+class IncrementalRenderer:
+    """
+    Build up a report's context in parts and render the template once.
+
+    update() only merges into the pending context; finalize() renders and
+    writes the document a single time, however many parts were supplied.
+    """
+
+    def __init__(self, template_name: str, context: dict | None = None):
+        self.template_name = template_name
+        self._ctx = dict(context or {})
+
+    def update(self, partial: dict) -> "IncrementalRenderer":
+        """Merge partial into the context, replacing existing top-level keys."""
+        self._ctx.update(partial)
+        return self
+
+    def finalize(self, output_name: str | None = None) -> Path:
+        """Render the template with the accumulated context and save it."""
+        return render_docx(self.template_name, self._ctx, output_name)
+
+
+def warm_templates() -> None:
+    """
+    Load and compile every template in TEMPLATE_DIR ahead of the first request.
+    """
+    if not TEMPLATE_DIR.exists():
+        return
+    for template_path in TEMPLATE_DIR.glob("*.docx"):
+        # Skip hidden files and Word's "~$name.docx" lock files
+        if template_path.name.startswith((".", "~$")):
+            continue
+        try:
+            prototype = _load_template(str(template_path), template_path.stat().st_mtime_ns)
+        except Exception as exc:
+            # A broken file must not fail the process pool initializer
+            logger.warning("Could not load template %s: %s", template_path.name, exc)
+            continue
+        try:
+            # An empty context may not satisfy the template; compiling is what matters
+            _copy_template(prototype).render({}, jinja_env=_JINJA_ENV)
+        except Exception:
+            pass
@@ -1,14 +1,38 @@
 """Pytest configuration and fixtures."""
 
 import json
+import sys
 import pytest
 from pathlib import Path
 
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Make the src/ packages importable once for the whole session
+sys.path.insert(0, str(_REPO_ROOT / "src"))
+
+from client_reports.pdf import _find_soffice
+
+
+@pytest.fixture(autouse=True)
+def _clear_soffice_lookup():
+    """Forget the cached soffice location so each test sees its own PATH mocks."""
+    _find_soffice.cache_clear()
+    yield
+    _find_soffice.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def pdf_cache_dir(monkeypatch, tmp_path_factory):
+    """Keep each test's PDF cache out of the user's home directory."""
+    cache_dir = tmp_path_factory.mktemp("pdf_cache")
+    monkeypatch.setattr("client_reports.pdf.PDF_CACHE_DIR", cache_dir)
+    return cache_dir
+
 
 @pytest.fixture
 def project_root():
     """Return the project root directory."""
-    return Path(__file__).resolve().parents[1]
+    return _REPO_ROOT
 
 
 @pytest.fixture
@@ -16,8 +40,7 @@ def sample_data(project_root):
     """Load sample client data."""
     data_file = project_root / "data" / "sample_client.json"
     if data_file.exists():
-        with open(data_file, "r") as f:
-            return json.load(f)
+        return json.loads(data_file.read_bytes())
     return {}
 
 
@@ -2,15 +2,13 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from pathlib import Path
 from unittest.mock import patch, MagicMock
+import os
 import tempfile
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
-
-from api.main import app
+from api.main import app, _save_upload
 from api.models import BrandConfig
 from api.storage import BrandStorage
 
@@ -77,6 +75,46 @@ class TestClientEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
+        listed = next(c for c in data if c["client_id"] == sample_brand["client_id"])
+        assert listed == client.get(f"/clients/{sample_brand['client_id']}").json()
+    
+    def test_list_clients_not_modified(self, client, sample_brand):
+        """Test a matching If-None-Match returns 304 until clients change."""
+        client.post("/clients", json=sample_brand)
+        etag = client.get("/clients").headers["etag"]
+        
+        response = client.get("/clients", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        client.post("/clients", json={**sample_brand, "display_name": "Renamed"})
+        response = client.get("/clients", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
+    def test_get_client_not_modified(self, client, sample_brand):
+        """Test a matching If-None-Match on a single client returns 304."""
+        client.post("/clients", json=sample_brand)
+        url = f"/clients/{sample_brand['client_id']}"
+        etag = client.get(url).headers["etag"]
+        
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+    
+    def test_get_client_etag_taken_before_read(self, client, sample_brand):
+        """Test a concurrent update cannot tag the old body with the new version."""
+        from api.main import storage
+        client.post("/clients", json=sample_brand)
+        real_get = storage.get
+        
+        def get_then_update(client_id):
+            brand = real_get(client_id)
+            storage.upsert(brand.model_copy(update={"display_name": "Renamed"}))
+            return brand
+        
+        with patch.object(storage, "get", side_effect=get_then_update):
+            response = client.get(f"/clients/{sample_brand['client_id']}")
+        
+        assert response.headers["etag"] != f'W/"{storage.version}"'
     
     def test_delete_client_not_found(self, client):
         """Test deleting non-existent client returns 404."""
@@ -93,6 +131,47 @@ class TestLogoUpload:
         files = {"file": ("logo.png", b"fake image content", "image/png")}
         response = client.post("/clients/nonexistent/logo", files=files)
         assert response.status_code == 404
+    
+    def test_upload_logo(self, client, sample_brand, tmp_path):
+        """Test uploading a logo writes the file and records its path."""
+        client.post("/clients", json=sample_brand)
+        files = {"file": ("logo.png", b"fake image content", "image/png")}
+        
+        with patch("api.main.BRANDS_DIR", tmp_path):
+            response = client.post(f"/clients/{sample_brand['client_id']}/logo", files=files)
+        
+        assert response.status_code == 200
+        logo_path = tmp_path / f"{sample_brand['client_id']}_logo.png"
+        assert logo_path.read_bytes() == b"fake image content"
+        assert response.json()["logo_path"] == str(logo_path)
+
+
+class TestSaveUpload:
+    """Tests for copying uploads to disk."""
+    
+    def test_rolled_upload_uses_sendfile(self, tmp_path):
+        """Test uploads spooled to disk are copied with sendfile."""
+        src = tempfile.SpooledTemporaryFile(max_size=4)
+        src.write(b"spooled to disk")
+        dest = tmp_path / "logo.png"
+        
+        with patch("os.sendfile", wraps=os.sendfile) as mock_sendfile:
+            _save_upload(src, dest)
+        
+        mock_sendfile.assert_called()
+        assert dest.read_bytes() == b"spooled to disk"
+    
+    def test_in_memory_upload_is_copied(self, tmp_path):
+        """Test in-memory uploads are copied without forcing a rollover."""
+        src = tempfile.SpooledTemporaryFile(max_size=1024)
+        src.write(b"in memory")
+        dest = tmp_path / "logo.png"
+        
+        with patch("os.sendfile") as mock_sendfile:
+            _save_upload(src, dest)
+        
+        mock_sendfile.assert_not_called()
+        assert dest.read_bytes() == b"in memory"
 
 
 class TestTemplatesEndpoint:
@@ -105,6 +184,17 @@ class TestTemplatesEndpoint:
         data = response.json()
         assert "templates" in data
         assert isinstance(data["templates"], list)
+    
+    def test_list_templates_is_cached(self, client, tmp_path):
+        """Test the directory listing is reused within the cache TTL."""
+        (tmp_path / "first.docx").write_bytes(b"PK")
+        
+        with patch("client_reports.TEMPLATE_DIR", tmp_path), patch("api.main._templates_cache", None):
+            first = client.get("/templates").json()
+            (tmp_path / "second.docx").write_bytes(b"PK")
+            second = client.get("/templates").json()
+        
+        assert first == second == {"templates": ["first.docx"]}
 
 
 class TestReportGeneration:
@@ -120,10 +210,117 @@ class TestReportGeneration:
         response = client.post("/reports/generate", json=request_data)
         assert response.status_code == 404
     
+    @patch("api.main.render_docx")
+    def test_generate_report(self, mock_render, client, sample_brand, tmp_path):
+        """Test generating a report renders the template with client context."""
+        client.post("/clients", json=sample_brand)
+        mock_render.return_value = tmp_path / "report.docx"
+        request_data = {
+            "client_id": sample_brand["client_id"],
+            "output_filename": "report.docx",
+            "metrics": [{"name": "Revenue", "value": "$1M", "change": "+10%"}],
+        }
+        
+        response = client.post("/reports/generate", json=request_data)
+        
+        assert response.status_code == 200
+        assert response.json()["docx_path"] == str(tmp_path / "report.docx")
+        template_name, context, output_name = mock_render.call_args[0]
+        assert template_name == "sample_report.docx"
+        assert context["client_name"] == sample_brand["display_name"]
+        assert context["metrics"] == [
+            {"name": "Revenue", "value": "$1M", "change": "+10%", "status": "neutral"}
+        ]
+        assert context["contact"] == {}
+        assert output_name == "report.docx"
+    
+    @patch("api.main._report_date", "January 01, 2030")
+    @patch("api.main.render_docx")
+    def test_generate_report_defaults(self, mock_render, client, sample_brand, tmp_path):
+        """Test the default report date and output filename."""
+        client.post("/clients", json=sample_brand)
+        mock_render.return_value = tmp_path / "report.docx"
+        
+        response = client.post("/reports/generate", json={"client_id": sample_brand["client_id"]})
+        
+        assert response.status_code == 200
+        _, context, output_name = mock_render.call_args[0]
+        assert context["report_date"] == "January 01, 2030"
+        assert output_name.startswith(f"{sample_brand['client_id']}_report_")
+        assert output_name.endswith(".docx")
+        
+        client.post("/reports/generate", json={"client_id": sample_brand["client_id"]})
+        assert mock_render.call_args[0][2] != output_name
+    
+    @patch("api.main.render_docx")
+    def test_generate_report_uses_render_pool(self, mock_render, client, sample_brand, tmp_path):
+        """Test rendering is dispatched to the render pool when one is running."""
+        client.post("/clients", json=sample_brand)
+        mock_render.return_value = tmp_path / "report.docx"
+        executor = ThreadPoolExecutor(max_workers=1)
+        pool = MagicMock(wraps=executor)
+        
+        with patch("api.main._render_pool", pool):
+            response = client.post("/reports/generate", json={"client_id": sample_brand["client_id"]})
+        executor.shutdown()
+        
+        assert response.status_code == 200
+        pool.submit.assert_called_once()
+        mock_render.assert_called_once()
+    
+    @patch("api.main.render_docx")
+    def test_broken_render_pool_is_replaced(self, mock_render, client, sample_brand, tmp_path):
+        """Test a render pool whose process died is rebuilt and the render retried."""
+        from concurrent.futures.process import BrokenProcessPool
+        import api.main
+        
+        client.post("/clients", json=sample_brand)
+        mock_render.return_value = tmp_path / "report.docx"
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool("worker died")
+        replacement = ThreadPoolExecutor(max_workers=1)
+        
+        with patch("api.main._render_pool", broken), \
+                patch("api.main._new_render_pool", return_value=replacement):
+            response = client.post("/reports/generate", json={"client_id": sample_brand["client_id"]})
+            assert api.main._render_pool is replacement
+        replacement.shutdown()
+        
+        assert response.status_code == 200
+        broken.shutdown.assert_called_once_with(wait=False)
+        mock_render.assert_called_once()
+    
     def test_download_report_not_found(self, client):
         """Test downloading non-existent report returns 404."""
         response = client.get("/reports/download/nonexistent.docx")
         assert response.status_code == 404
+    
+    def test_download_report(self, client, tmp_path):
+        """Test downloading a generated report streams the file with cache headers."""
+        (tmp_path / "report.pdf").write_bytes(b"%PDF-1.4 test")
+        
+        with patch("client_reports.OUTPUT_DIR", tmp_path):
+            response = client.get("/reports/download/report.pdf")
+        
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 test"
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["cache-control"] == "private, no-cache"
+    
+    def test_download_report_revalidates(self, client, tmp_path):
+        """Test an unchanged report is a 304 and a re-rendered one is sent again."""
+        report = tmp_path / "report.pdf"
+        report.write_bytes(b"%PDF-1.4 first")
+        
+        with patch("client_reports.OUTPUT_DIR", tmp_path):
+            etag = client.get("/reports/download/report.pdf").headers["etag"]
+            cached = client.get("/reports/download/report.pdf", headers={"If-None-Match": etag})
+            report.write_bytes(b"%PDF-1.4 second render")
+            changed = client.get("/reports/download/report.pdf", headers={"If-None-Match": etag})
+        
+        assert cached.status_code == 304
+        assert changed.status_code == 200
+        assert changed.content == b"%PDF-1.4 second render"
 
 
 class TestBrandStorage:
@@ -141,6 +338,97 @@ class TestBrandStorage:
         assert retrieved is not None
         assert retrieved.display_name == brand.display_name
     
+    def test_storage_file_is_compact_json(self, tmp_path, sample_brand):
+        """Test the storage file holds every brand as compact JSON."""
+        storage_path = tmp_path / "compact_test.json"
+        storage = BrandStorage(storage_path)
+        storage.upsert(BrandConfig(**sample_brand))
+        storage.upsert(BrandConfig(client_id="corp2", display_name="Corp 2"))
+        
+        content = storage_path.read_bytes()
+        assert b"\n" not in content
+        assert json.loads(content) == {
+            k: storage.get(k).model_dump(mode="json") for k in (sample_brand["client_id"], "corp2")
+        }
+    
+    def test_get_all_json(self, temp_storage, sample_brand):
+        """Test the serialized brand list tracks mutations."""
+        temp_storage.upsert(BrandConfig(**sample_brand))
+        temp_storage.upsert(BrandConfig(client_id="corp2", display_name="Corp 2"))
+        temp_storage.update_logo("corp2", "/path/to/logo.png")
+        temp_storage.delete(sample_brand["client_id"])
+        
+        data = json.loads(temp_storage.get_all_json())
+        assert data == [temp_storage.get("corp2").model_dump(mode="json")]
+    
+    def test_concurrent_upserts(self, tmp_path):
+        """Test concurrent upserts are all persisted without leaving temp files."""
+        storage_path = tmp_path / "concurrent_test.json"
+        storage = BrandStorage(storage_path)
+        brands = [BrandConfig(client_id=f"corp{i}", display_name=f"Corp {i}") for i in range(20)]
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(storage.upsert, brands))
+        
+        assert len(BrandStorage(storage_path).get_all()) == 20
+        # Nothing but the data file and its inter-process lock file remains
+        assert [p for p in tmp_path.iterdir() if p.suffix != ".lock"] == [storage_path]
+    
+    def test_processes_share_one_file(self, tmp_path):
+        """Test storages on one file see and keep each other's changes."""
+        storage_path = tmp_path / "shared.json"
+        worker_a, worker_b = BrandStorage(storage_path), BrandStorage(storage_path)
+        
+        worker_a.upsert(BrandConfig(client_id="corp_a", display_name="Corp A"))
+        assert worker_b.get("corp_a") is not None
+        
+        worker_b.upsert(BrandConfig(client_id="corp_b", display_name="Corp B"))
+        worker_a.delete("corp_a")
+        
+        assert [b.client_id for b in worker_b.get_all()] == ["corp_b"]
+        assert [b.client_id for b in BrandStorage(storage_path).get_all()] == ["corp_b"]
+    
+    def test_unwritten_changes_survive_other_writers(self, tmp_path):
+        """Test a pending coalesced change is merged into another process's write."""
+        storage_path = tmp_path / "merge.json"
+        worker_a = BrandStorage(storage_path, flush_interval=60)
+        worker_b = BrandStorage(storage_path)
+        
+        worker_a.upsert(BrandConfig(client_id="corp_a", display_name="Corp A"))
+        worker_b.upsert(BrandConfig(client_id="corp_b", display_name="Corp B"))
+        assert worker_a.get("corp_a") is not None
+        worker_a.flush()
+        
+        stored = {b.client_id for b in BrandStorage(storage_path).get_all()}
+        assert stored == {"corp_a", "corp_b"}
+    
+    def test_writes_are_coalesced(self, tmp_path):
+        """Test that mutations within the flush interval share one write."""
+        storage_path = tmp_path / "coalesce_test.json"
+        storage = BrandStorage(storage_path, flush_interval=60)
+        
+        with patch.object(storage, "_write", wraps=storage._write) as mock_write:
+            storage.upsert(BrandConfig(client_id="corp1", display_name="Corp 1"))
+            storage.upsert(BrandConfig(client_id="corp2", display_name="Corp 2"))
+            assert not storage_path.exists()
+            
+            storage.flush()
+        
+        mock_write.assert_called_once()
+        assert len(BrandStorage(storage_path).get_all()) == 2
+    
+    def test_failed_flush_is_retried(self, tmp_path):
+        """Test a write that fails on flush keeps the changes pending."""
+        storage_path = tmp_path / "retry_test.json"
+        storage = BrandStorage(storage_path, flush_interval=60)
+        storage.upsert(BrandConfig(client_id="corp1", display_name="Corp 1"))
+        
+        with patch.object(storage, "_write", side_effect=OSError("disk full")):
+            storage.flush()
+        storage.flush()
+        
+        assert BrandStorage(storage_path).get("corp1") is not None
+    
     def test_update_existing(self, temp_storage, sample_brand):
         """Test updating an existing brand."""
         brand = BrandConfig(**sample_brand)
@@ -203,4 +491,3 @@ class TestBrandStorage:
         
         assert retrieved is not None
         assert retrieved.display_name == brand.display_name
-
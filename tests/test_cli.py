@@ -2,12 +2,8 @@
 
 import json
 import pytest
-from pathlib import Path
 from unittest.mock import patch, MagicMock, mock_open
 
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
-
 from client_reports.cli import main
 
 
@@ -72,6 +68,24 @@ class TestCLI:
         # Check that custom output name was passed
         call_args = mock_render.call_args
         assert call_args[0][2] == "custom.docx"
+    
+    @patch("client_reports.cli.docx_to_pdf_batch")
+    @patch("client_reports.cli.render_docx")
+    @patch("sys.argv", ["cli", "--template", "test.docx", "--data", "data.json", "--pdf"])
+    def test_main_batch(self, mock_render, mock_batch, sample_context, tmp_path, capsys):
+        """Test a JSON array renders one report per item and converts them together."""
+        mock_render.side_effect = lambda template, context, name: tmp_path / name
+        mock_batch.return_value = [tmp_path / "test_rendered_1.pdf", tmp_path / "test_rendered_2.pdf"]
+        
+        with patch("builtins.open", mock_open(read_data=json.dumps([sample_context, sample_context]))):
+            main()
+        
+        output_names = [call[0][2] for call in mock_render.call_args_list]
+        assert output_names == ["test_rendered_1.docx", "test_rendered_2.docx"]
+        mock_batch.assert_called_once_with(
+            [tmp_path / "test_rendered_1.docx", tmp_path / "test_rendered_2.docx"], tmp_path
+        )
+        assert capsys.readouterr().out.count("PDF generated") == 2
 
 
 class TestCLIArguments:
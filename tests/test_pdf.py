@@ -1,77 +1,225 @@
 """Tests for the PDF conversion module."""
 
+import errno
+import importlib.resources
+import os
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 import subprocess
+import zipfile
 
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
-
+from client_reports import loads
 from client_reports.pdf import (
     docx_to_pdf,
+    docx_to_pdf_batch,
+    docx_to_pdf_parallel,
+    render_and_convert_pdf,
     PdfConversionError,
     _convert_with_libreoffice,
+    _cache_store,
+    _convert_one,
+    _docx_digest,
+    _move_into_place,
+    _start_soffice_server,
+    LibreOfficePool,
+    LibreOfficeServer,
+    start_libreoffice_pool,
 )
 
+_DATA = Path(__file__).resolve().parents[1] / "data"
+_MINIMAL_DOCX = importlib.resources.files("tests").joinpath("fixtures/minimal.docx").read_bytes()
+
+
+def _fake_libreoffice(docx_path, output_dir):
+    """Stand-in for _convert_with_libreoffice that writes a placeholder PDF."""
+    pdf = output_dir / (docx_path.stem + ".pdf")
+    pdf.write_bytes(b"%PDF-1.4")
+    return pdf
+
 
 class TestDocxToPdf:
     """Tests for docx_to_pdf function."""
     
     @pytest.fixture
     def mock_docx_file(self, tmp_path):
-        """Create a mock DOCX file for testing."""
+        """Create a minimal DOCX file for testing."""
+        # Only the bytes are shared; PDFs written beside the file stay per test
         docx_file = tmp_path / "test.docx"
-        docx_file.write_text("mock docx content")
+        docx_file.write_bytes(_MINIMAL_DOCX)
         return docx_file
     
-    @patch("shutil.which")
-    @patch("client_reports.pdf._convert_with_libreoffice")
+    @pytest.fixture
+    def mock_convert(self, monkeypatch):
+        """Replace the LibreOffice backend with a mock."""
+        mock = MagicMock(side_effect=_fake_libreoffice)
+        monkeypatch.setattr("client_reports.pdf._convert_with_libreoffice", mock)
+        return mock
+    
+    @pytest.fixture
+    def patched_backend(self):
+        """Report soffice on PATH and mock the LibreOffice backend."""
+        with patch("shutil.which", return_value="/usr/bin/soffice") as mock_which, \
+                patch("client_reports.pdf._convert_with_libreoffice",
+                      side_effect=_fake_libreoffice) as mock_convert:
+            yield mock_which, mock_convert
+    
     def test_uses_libreoffice_when_available(
-        self, mock_convert, mock_which, mock_docx_file, tmp_path
+        self, monkeypatch, mock_convert, mock_docx_file, tmp_path
     ):
         """Test that LibreOffice is preferred when available."""
-        mock_which.return_value = "/usr/bin/soffice"
-        expected_pdf = tmp_path / "test.pdf"
-        mock_convert.return_value = expected_pdf
+        monkeypatch.setattr("shutil.which", lambda _: "/usr/bin/soffice")
         
         result = docx_to_pdf(mock_docx_file)
         
         mock_convert.assert_called_once()
-        assert result == expected_pdf
+        assert result == mock_docx_file.with_suffix(".pdf")
+        assert result.read_bytes() == b"%PDF-1.4"
+    
+    def test_soffice_lookup_is_cached(self, monkeypatch, mock_convert, mock_docx_file):
+        """Test that PATH is scanned for soffice once across conversions."""
+        mock_which = MagicMock(return_value="/usr/bin/soffice")
+        monkeypatch.setattr("shutil.which", mock_which)
+        
+        docx_to_pdf(mock_docx_file, cache=False)
+        docx_to_pdf(mock_docx_file, cache=False)
+        
+        mock_which.assert_called_once_with("soffice")
+        assert mock_convert.call_count == 2
+    
+    def test_identical_documents_convert_once(self, monkeypatch, mock_convert, tmp_path):
+        """Test that converting the same document again is served from the PDF cache."""
+        monkeypatch.setattr("shutil.which", lambda _: "/usr/bin/soffice")
+        
+        def convert(docx_path, output_dir):
+            pdf = output_dir / (docx_path.stem + ".pdf")
+            pdf.write_bytes(b"%PDF-1.4 " + docx_path.name.encode())
+            return pdf
+        
+        mock_convert.side_effect = convert
+        first = tmp_path / "first" / "report.docx"
+        second = tmp_path / "second" / "report.docx"
+        for path in (first, second):
+            path.parent.mkdir()
+            path.write_bytes(_MINIMAL_DOCX)
+        
+        assert docx_to_pdf(first).read_bytes() == b"%PDF-1.4 report.docx"
+        result = docx_to_pdf(second)
+        
+        mock_convert.assert_called_once()
+        assert result == second.with_suffix(".pdf")
+        assert result.read_bytes() == b"%PDF-1.4 report.docx"
+    
+    def test_cache_key_separates_entry_boundaries(self, tmp_path):
+        """Test that moving bytes between zip entries changes the cache key."""
+        split, merged = tmp_path / "split.docx", tmp_path / "merged.docx"
+        with zipfile.ZipFile(split, "w") as zf:
+            zf.writestr("x", b"1")
+            zf.writestr("y", b"2")
+        with zipfile.ZipFile(merged, "w") as zf:
+            zf.writestr("x", b"1y\x002")
+        
+        assert _docx_digest(split) != _docx_digest(merged)
+    
+    def test_cache_store_uses_unique_temp_files(self, pdf_cache_dir, tmp_path):
+        """Test concurrent stores of one key never share a temporary file."""
+        pdf = tmp_path / "report.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        
+        with patch("os.replace", wraps=os.replace) as mock_replace:
+            _cache_store("abc", pdf)
+            _cache_store("abc", pdf)
+        
+        first, second = (call.args[0] for call in mock_replace.call_args_list)
+        assert first != second
+        assert [p.name for p in pdf_cache_dir.iterdir()] == ["abc.pdf"]
+    
+    def test_cache_evicts_least_recently_used(self, monkeypatch, mock_convert, pdf_cache_dir, tmp_path):
+        """Test that the PDF cache keeps at most PDF_CACHE_MAX_ENTRIES files."""
+        monkeypatch.setattr("shutil.which", lambda _: "/usr/bin/soffice")
+        monkeypatch.setattr("client_reports.pdf.PDF_CACHE_MAX_ENTRIES", 2)
+        
+        for i in range(3):
+            docx = tmp_path / f"report_{i}.docx"
+            docx.write_bytes(f"not a zip {i}".encode())
+            docx_to_pdf(docx)
+        
+        assert mock_convert.call_count == 3
+        assert len(list(pdf_cache_dir.glob("*.pdf"))) == 2
+    
+    def test_staging_via_tmpfs_when_available(self, monkeypatch, mock_convert, mock_docx_file, tmp_path):
+        """Test that soffice writes into a tmpfs staging dir and the PDF is moved into place."""
+        monkeypatch.setattr("shutil.which", lambda _: "/usr/bin/soffice")
+        shm = tmp_path / "shm"
+        shm.mkdir()
+        monkeypatch.setattr("client_reports.pdf._SHM_DIR", shm)
+        custom_output = tmp_path / "out" / "renamed.pdf"
+        
+        result = docx_to_pdf(mock_docx_file, custom_output, cache=False)
+        
+        outdir = mock_convert.call_args[0][1]
+        assert outdir.parent == shm
+        assert not outdir.exists()
+        assert result == custom_output
+        assert custom_output.read_bytes() == b"%PDF-1.4"
+    
+    @patch("subprocess.run")
+    def test_missing_output_raises_conversion_error(self, mock_run, monkeypatch, mock_docx_file):
+        """Test soffice exiting 0 without writing a PDF is a conversion error."""
+        monkeypatch.setattr("shutil.which", lambda _: "/usr/bin/soffice")
+        mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+        
+        with pytest.raises(PdfConversionError) as exc_info:
+            docx_to_pdf(mock_docx_file)
+        
+        assert "produced no output" in str(exc_info.value)
+    
+    def test_move_into_place_copies_across_filesystems(self, tmp_path):
+        """Test that a cross-device rename falls back to copy and rename."""
+        src = tmp_path / "staged.pdf"
+        src.write_bytes(b"%PDF-1.4")
+        dest = tmp_path / "final.pdf"
+        real_replace = os.replace
+        
+        def replace(a, b):
+            if Path(a) == src:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_replace(a, b)
+        
+        with patch("os.replace", side_effect=replace):
+            _move_into_place(src, dest)
+        
+        assert dest.read_bytes() == b"%PDF-1.4"
+        assert not dest.with_name("final.pdf.part").exists()
     
-    @patch("shutil.which")
-    @patch("sys.platform", "linux")
-    def test_raises_error_when_no_backend_on_linux(self, mock_which, mock_docx_file):
+    def test_raises_error_when_no_backend_on_linux(self, monkeypatch, mock_docx_file):
         """Test that error is raised when no PDF backend is found on Linux."""
-        mock_which.return_value = None
+        monkeypatch.setattr("shutil.which", lambda _: None)
+        monkeypatch.setattr("sys.platform", "linux")
         
         with pytest.raises(PdfConversionError) as exc_info:
             docx_to_pdf(mock_docx_file)
         
         assert "No PDF backend found" in str(exc_info.value)
     
-    def test_output_path_defaults_to_same_directory(self, mock_docx_file):
+    def test_output_path_defaults_to_same_directory(self, patched_backend, mock_docx_file):
         """Test that output defaults to same directory with .pdf extension."""
-        with patch("shutil.which", return_value="/usr/bin/soffice"):
-            with patch("client_reports.pdf._convert_with_libreoffice") as mock_convert:
-                mock_convert.return_value = mock_docx_file.with_suffix(".pdf")
-                result = docx_to_pdf(mock_docx_file)
+        result = docx_to_pdf(mock_docx_file)
         
         assert result.suffix == ".pdf"
         assert result.stem == mock_docx_file.stem
     
-    def test_custom_output_path(self, mock_docx_file, tmp_path):
+    def test_custom_output_path(self, patched_backend, mock_docx_file, tmp_path):
         """Test conversion with custom output path."""
+        _, mock_convert = patched_backend
         custom_output = tmp_path / "custom" / "output.pdf"
         
-        with patch("shutil.which", return_value="/usr/bin/soffice"):
-            with patch("client_reports.pdf._convert_with_libreoffice") as mock_convert:
-                mock_convert.return_value = custom_output
-                result = docx_to_pdf(mock_docx_file, custom_output)
+        result = docx_to_pdf(mock_docx_file, custom_output)
         
         # The function should create parent directories
         mock_convert.assert_called_once()
+        assert result == custom_output
+        assert custom_output.exists()
 
 
 class TestLibreOfficeConversion:
@@ -79,9 +227,10 @@ class TestLibreOfficeConversion:
     
     @pytest.fixture
     def mock_docx_file(self, tmp_path):
-        """Create a mock DOCX file."""
+        """Create a minimal DOCX file."""
+        # Only the bytes are shared; PDFs written beside the file stay per test
         docx_file = tmp_path / "test.docx"
-        docx_file.write_text("mock")
+        docx_file.write_bytes(_MINIMAL_DOCX)
         return docx_file
     
     @patch("subprocess.run")
@@ -96,7 +245,7 @@ class TestLibreOfficeConversion:
         
         # Verify soffice was called with correct args
         call_args = mock_run.call_args[0][0]
-        assert "soffice" in call_args
+        assert Path(call_args[0]).name in {"soffice", "libreoffice"}
         assert "--headless" in call_args
         assert "--convert-to" in call_args
         assert "pdf" in call_args
@@ -106,13 +255,313 @@ class TestLibreOfficeConversion:
         """Test LibreOffice conversion failure."""
         mock_run.return_value = MagicMock(
             returncode=1,
-            stderr="Error: conversion failed"
+            stderr=b"Error: conversion failed"
         )
         
         with pytest.raises(PdfConversionError) as exc_info:
             _convert_with_libreoffice(mock_docx_file, tmp_path)
         
         assert "LibreOffice failed" in str(exc_info.value)
+        assert "Error: conversion failed" in str(exc_info.value)
+        kwargs = mock_run.call_args.kwargs
+        assert kwargs["stderr"] is subprocess.PIPE
+        assert kwargs["stdout"] is subprocess.DEVNULL
+    
+    @patch("subprocess.run")
+    def test_libreoffice_timeout(self, mock_run, mock_docx_file, tmp_path):
+        """Test a hung soffice is reported as a conversion failure."""
+        mock_run.side_effect = subprocess.TimeoutExpired("soffice", 60)
+        
+        with pytest.raises(PdfConversionError) as exc_info:
+            _convert_with_libreoffice(mock_docx_file, tmp_path)
+        
+        assert "timed out" in str(exc_info.value)
+    
+    @patch("subprocess.run")
+    def test_uses_given_server(self, mock_run, mock_docx_file, tmp_path):
+        """Test that an explicit server handle takes precedence."""
+        mock_server = MagicMock()
+        mock_server.convert.return_value = tmp_path / "test.pdf"
+        
+        result = _convert_with_libreoffice(mock_docx_file, tmp_path, server=mock_server)
+        
+        assert result == tmp_path / "test.pdf"
+        mock_server.convert.assert_called_once_with(mock_docx_file, tmp_path)
+        mock_run.assert_not_called()
+    
+    @patch("subprocess.run")
+    def test_uses_running_pool(self, mock_run, mock_docx_file, tmp_path):
+        """Test that a running LibreOffice pool is used instead of spawning soffice."""
+        mock_pool = MagicMock()
+        mock_pool.convert.return_value = tmp_path / "test.pdf"
+        
+        with patch("client_reports.pdf._pool", mock_pool):
+            result = _convert_with_libreoffice(mock_docx_file, tmp_path)
+        
+        assert result == tmp_path / "test.pdf"
+        mock_pool.convert.assert_called_once_with(mock_docx_file, tmp_path)
+        mock_run.assert_not_called()
+    
+    @patch("client_reports.pdf.uno", None)
+    def test_pool_not_started_without_pyuno(self):
+        """Test that no pool is started when pyuno is unavailable."""
+        assert start_libreoffice_pool() is None
+
+
+class TestLibreOfficePool:
+    """Tests for the pool of LibreOffice servers."""
+    
+    def test_servers_get_distinct_profiles_and_ports(self):
+        """Test every server has its own port and UserInstallation profile."""
+        pool = LibreOfficePool(size=3)
+        
+        assert len({server.port for server in pool.servers}) == 3
+        assert len({server.profile_dir for server in pool.servers}) == 3
+    
+    def test_convert_returns_server_to_pool(self, tmp_path):
+        """Test a server is handed back after each conversion."""
+        pool = LibreOfficePool(size=1)
+        server = MagicMock()
+        pool.servers = [server]
+        pool._idle.put(server)
+        
+        pool.convert(tmp_path / "a.docx", tmp_path)
+        pool.convert(tmp_path / "b.docx", tmp_path)
+        
+        assert server.convert.call_count == 2
+    
+    def test_convert_times_out_when_no_server_is_free(self, tmp_path):
+        """Test callers fail instead of waiting forever behind a hung server."""
+        pool = LibreOfficePool(size=1, timeout=0.01)
+        
+        with pytest.raises(PdfConversionError) as exc_info:
+            pool.convert(tmp_path / "a.docx", tmp_path)
+        
+        assert "No LibreOffice server became free" in str(exc_info.value)
+    
+    def test_check_health_restarts_dead_servers(self):
+        """Test only servers whose process died are restarted."""
+        pool = LibreOfficePool(size=2)
+        alive, dead = MagicMock(), MagicMock()
+        alive.is_alive.return_value = True
+        dead.is_alive.return_value = False
+        pool.servers = [alive, dead]
+        
+        pool.check_health()
+        
+        alive.restart.assert_not_called()
+        dead.restart.assert_called_once()
+    
+    def test_check_health_survives_unexpected_errors(self):
+        """Test a restart failing with a non-conversion error does not escape."""
+        pool = LibreOfficePool(size=1)
+        dead = MagicMock()
+        dead.is_alive.return_value = False
+        dead.restart.side_effect = OSError("soffice vanished")
+        pool.servers = [dead]
+        
+        pool.check_health()
+        
+        dead.restart.assert_called_once()
+    
+    @patch("client_reports.pdf.uno", MagicMock())
+    def test_server_retries_start_on_another_port(self):
+        """Test a server that picked its own port retries when soffice fails to start."""
+        server = LibreOfficeServer()
+        first_port = server.port
+        
+        with patch.object(server, "_launch", side_effect=[PdfConversionError("exited"), None]) as launch, \
+                patch("client_reports.pdf._free_port", return_value=first_port + 1):
+            server.start()
+        
+        assert launch.call_count == 2
+        assert server.port == first_port + 1
+    
+    def test_server_profile_does_not_depend_on_port(self):
+        """Test servers on the same port still get separate profiles."""
+        first, second = LibreOfficeServer(port=8100), LibreOfficeServer(port=8100)
+        
+        assert first.profile_dir != second.profile_dir
+
+
+class TestDocxToPdfBatch:
+    """Tests for batch DOCX → PDF conversion."""
+    
+    @patch("client_reports.pdf.uno", None)
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_batches_files_per_soffice_call(self, mock_run, mock_which, tmp_path):
+        """Test that files are converted BATCH_SIZE at a time."""
+        mock_run.return_value = MagicMock(returncode=0, stderr="")
+        docx_files = []
+        for i in range(12):
+            docx_file = tmp_path / f"report_{i}.docx"
+            docx_file.write_text("mock")
+            docx_files.append(docx_file)
+        
+        result = docx_to_pdf_batch(docx_files, tmp_path / "pdf")
+        
+        assert mock_run.call_count == 2
+        assert result == [tmp_path / "pdf" / f"report_{i}.pdf" for i in range(12)]
+        first_call_args = mock_run.call_args_list[0][0][0]
+        assert [a for a in first_call_args if a.endswith(".docx")] == [str(p) for p in docx_files[:10]]
+    
+    @patch("client_reports.pdf.uno", None)
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_failed_batch_is_retried_per_file(self, mock_run, mock_which, tmp_path):
+        """Test a failing batch is split up to identify the broken document."""
+        docx_files = [tmp_path / "good.docx", tmp_path / "bad.docx"]
+        
+        def run(args, **kwargs):
+            failed = str(docx_files[1]) in args
+            return MagicMock(returncode=1 if failed else 0, stderr=b"cannot load")
+        mock_run.side_effect = run
+        
+        with pytest.raises(PdfConversionError) as exc_info:
+            docx_to_pdf_batch(docx_files, tmp_path)
+        
+        assert mock_run.call_count == 3
+        assert "bad.docx" in str(exc_info.value)
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_small_batch_invokes_soffice_once(self, mock_run, mock_which, tmp_path):
+        """Test two files share a single soffice process when pyuno is unavailable."""
+        mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+        docx_files = [tmp_path / "a.docx", tmp_path / "b.docx"]
+        
+        with patch("client_reports.pdf.uno", None):
+            docx_to_pdf_batch(docx_files, tmp_path)
+        
+        mock_run.assert_called_once()
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_batch_uses_one_uno_server(self, mock_run, mock_which, tmp_path):
+        """Test that with pyuno, one temporary server converts the whole batch."""
+        docx_files = [tmp_path / "a.docx", tmp_path / "b.docx"]
+        
+        with patch("client_reports.pdf.uno", MagicMock()), \
+                patch("client_reports.pdf.LibreOfficeServer") as mock_server_class:
+            server = mock_server_class.return_value
+            server.convert_many.return_value = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+            result = docx_to_pdf_batch(docx_files, tmp_path)
+        
+        mock_server_class.assert_called_once()
+        server.convert_many.assert_called_once_with(docx_files, tmp_path)
+        server.stop.assert_called_once()
+        assert result == [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+        mock_run.assert_not_called()
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_batch_falls_back_when_uno_server_fails(self, mock_run, mock_which, tmp_path):
+        """Test a UNO server that fails to start falls back to soffice batches."""
+        mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+        docx_files = [tmp_path / "a.docx", tmp_path / "b.docx"]
+        
+        with patch("client_reports.pdf.uno", MagicMock()), \
+                patch("client_reports.pdf.LibreOfficeServer") as mock_server_class:
+            mock_server_class.return_value.start.side_effect = PdfConversionError("timed out")
+            result = docx_to_pdf_batch(docx_files, tmp_path)
+        
+        mock_run.assert_called_once()
+        assert result == [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+
+
+class TestDocxToPdfParallel:
+    """Tests for docx_to_pdf_parallel function."""
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("client_reports.pdf.ProcessPoolExecutor")
+    def test_parallel_conversion_dispatches_processes(self, mock_executor_class, mock_which, tmp_path):
+        """Test that conversions are mapped over a pool of soffice worker processes."""
+        docx_files = [tmp_path / f"report_{i}.docx" for i in range(4)]
+        pdf_files = [p.with_suffix(".pdf") for p in docx_files]
+        executor = mock_executor_class.return_value.__enter__.return_value
+        executor.map.return_value = iter(pdf_files)
+        
+        result = docx_to_pdf_parallel(docx_files, tmp_path, max_workers=2)
+        
+        assert result == pdf_files
+        assert mock_executor_class.call_args[0][0] == 2
+        assert mock_executor_class.call_args[1]["initializer"] is _start_soffice_server
+        func, paths, dirs = executor.map.call_args[0]
+        assert func is _convert_one
+        assert list(paths) == docx_files
+        assert set(dirs) == {tmp_path}
+    
+    def test_worker_uses_its_own_server(self, tmp_path):
+        """Test that a worker converts through the soffice it started."""
+        mock_server = MagicMock()
+        mock_server.convert.return_value = tmp_path / "test.pdf"
+        
+        with patch("client_reports.pdf._worker_server", mock_server), \
+                patch("subprocess.run") as mock_run:
+            result = _convert_one(tmp_path / "test.docx", tmp_path)
+        
+        assert result == tmp_path / "test.pdf"
+        mock_server.convert.assert_called_once_with(tmp_path / "test.docx", tmp_path)
+        mock_run.assert_not_called()
+    
+    @patch("subprocess.run")
+    def test_worker_without_server_uses_own_profile(self, mock_run, tmp_path):
+        """Test per-file soffice runs in a worker use its private profile and check the output."""
+        mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+        profile = tmp_path / "profile"
+        
+        with patch("client_reports.pdf._worker_profile", profile):
+            with pytest.raises(PdfConversionError) as exc_info:
+                _convert_one(tmp_path / "test.docx", tmp_path)
+        
+        assert "produced no output" in str(exc_info.value)
+        assert f"-env:UserInstallation={profile.as_uri()}" in mock_run.call_args[0][0]
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("client_reports.pdf.ProcessPoolExecutor")
+    def test_broken_worker_raises_conversion_error(self, mock_executor_class, mock_which, tmp_path):
+        """Test a worker that failed to start surfaces as PdfConversionError."""
+        from concurrent.futures.process import BrokenProcessPool
+        executor = mock_executor_class.return_value.__enter__.return_value
+        executor.map.side_effect = BrokenProcessPool("initializer failed")
+        
+        with pytest.raises(PdfConversionError):
+            docx_to_pdf_parallel([tmp_path / "a.docx"], tmp_path)
+
+
+class TestRenderAndConvertPdf:
+    """Tests for rendering straight to PDF."""
+    
+    @staticmethod
+    def _fake_soffice(argv, **kwargs):
+        """Stand-in for subprocess.run that writes a PDF for every input file."""
+        outdir = Path(argv[argv.index("--outdir") + 1])
+        for docx in argv[argv.index("--outdir") + 2:]:
+            (outdir / (Path(docx).stem + ".pdf")).write_bytes(b"%PDF-1.4")
+        return MagicMock(returncode=0, stderr=b"")
+    
+    @patch("shutil.which", return_value="/usr/bin/soffice")
+    @patch("subprocess.run")
+    def test_no_intermediate_docx_in_output_dir(self, mock_run, mock_which, tmp_path):
+        """Test that the rendered DOCX never lands in OUTPUT_DIR."""
+        mock_run.side_effect = self._fake_soffice
+        context = loads((_DATA / "sample_client.json").read_bytes())
+        output_dir = tmp_path / "output"
+        shm = tmp_path / "shm"
+        shm.mkdir()
+        
+        with patch("client_reports.renderer.OUTPUT_DIR", output_dir), \
+                patch("client_reports.pdf._SHM_DIR", shm):
+            result = render_and_convert_pdf("sample_report.docx", context, output_dir / "report.pdf")
+        
+        assert result == output_dir / "report.pdf"
+        assert result.read_bytes() == b"%PDF-1.4"
+        assert list(output_dir.glob("*.docx")) == []
+        # The temporary DOCX was written to tmpfs and removed after conversion
+        docx_arg = Path(mock_run.call_args[0][0][-1])
+        assert docx_arg.parent == shm
+        assert list(shm.iterdir()) == []
 
 
 class TestPdfConversionError:
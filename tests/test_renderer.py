@@ -1,47 +1,91 @@
 """Tests for the renderer module."""
 
-import json
+import shutil
 import pytest
 from pathlib import Path
+from types import MappingProxyType
 from unittest.mock import MagicMock, patch
 
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+_DATA = _REPO_ROOT / "data"
 
-from client_reports.renderer import render_docx, TEMPLATE_DIR, OUTPUT_DIR
+from client_reports import loads
+from client_reports.renderer import (
+    render_docx,
+    warm_templates,
+    IncrementalRenderer,
+    _load_template,
+    _write_output,
+    _ensure_dir,
+    _JINJA_ENV,
+    DIRECT_IO_THRESHOLD,
+    TEMPLATE_DIR,
+    OUTPUT_DIR,
+)
+
+
+_SAMPLE_CONTEXT = {
+    "client_name": "Test Corp",
+    "report_date": "2025-01-01",
+    "report_period": "Q1 2025",
+    "prepared_by": "Test User",
+    "executive_summary": "Test summary",
+    "metrics": [
+        {"name": "Revenue", "value": "$1M", "change": "+10%", "status": "positive"}
+    ],
+    "highlights": ["Achievement 1", "Achievement 2"],
+    "recommendations": [
+        {"priority": "High", "title": "Action 1", "description": "Do something"}
+    ],
+    "contact": {
+        "name": "John Doe",
+        "title": "Manager",
+        "email": "john@test.com",
+        "phone": "555-1234"
+    }
+}
 
 
 class TestRenderDocx:
     """Tests for render_docx function."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_context(self):
-        """Sample context data for testing."""
-        return {
-            "client_name": "Test Corp",
-            "report_date": "2025-01-01",
-            "report_period": "Q1 2025",
-            "prepared_by": "Test User",
-            "executive_summary": "Test summary",
-            "metrics": [
-                {"name": "Revenue", "value": "$1M", "change": "+10%", "status": "positive"}
-            ],
-            "highlights": ["Achievement 1", "Achievement 2"],
-            "recommendations": [
-                {"priority": "High", "title": "Action 1", "description": "Do something"}
-            ],
-            "contact": {
-                "name": "John Doe",
-                "title": "Manager",
-                "email": "john@test.com",
-                "phone": "555-1234"
-            }
-        }
+        """Sample context data for testing, shared read-only across tests."""
+        return MappingProxyType(_SAMPLE_CONTEXT)
+    
+    @pytest.fixture(autouse=True)
+    def fake_templates(self, monkeypatch, tmp_path):
+        """Point TEMPLATE_DIR at a directory of placeholder templates."""
+        templates = tmp_path / "templates"
+        templates.mkdir()
+        for name in ("test.docx", "sample_report.docx"):
+            (templates / name).write_bytes(b"PK template")
+        _load_template.cache_clear()
+        monkeypatch.setattr("client_reports.renderer.TEMPLATE_DIR", templates)
+        # DocxTemplate is mocked in these tests, so render the prototype itself
+        monkeypatch.setattr("client_reports.renderer._copy_template", lambda t: t)
+        return templates
+    
+    @pytest.fixture
+    def mock_template_class(self, monkeypatch, tmp_path):
+        """Mock DocxTemplate and send output to tmp_path."""
+        mock_template_class = MagicMock()
+        monkeypatch.setattr("client_reports.renderer.DocxTemplate", mock_template_class)
+        monkeypatch.setattr("client_reports.renderer.OUTPUT_DIR", tmp_path)
+        monkeypatch.setattr("client_reports.renderer._DIR_READY", set())
+        monkeypatch.setattr(Path, "mkdir", MagicMock())
+        return mock_template_class
+    
+    @pytest.fixture
+    def mock_doc(self, mock_template_class):
+        """The document returned by the mocked DocxTemplate."""
+        return mock_template_class.return_value
     
     @pytest.fixture
     def data_dir(self):
         """Return path to test data directory."""
-        return Path(__file__).resolve().parents[1] / "data"
+        return _DATA
     
     def test_template_dir_exists(self):
         """Verify TEMPLATE_DIR is correctly configured."""
@@ -53,42 +97,143 @@ class TestRenderDocx:
         assert OUTPUT_DIR.name == "output"
         assert "reports" in str(OUTPUT_DIR)
     
-    @patch("client_reports.renderer.DocxTemplate")
-    def test_render_docx_creates_output(self, mock_template_class, sample_context, tmp_path):
+    def test_render_docx_creates_output(self, mock_doc, sample_context):
         """Test that render_docx creates output file."""
-        mock_doc = MagicMock()
-        mock_template_class.return_value = mock_doc
-        
-        with patch.object(Path, "mkdir"):
-            with patch("client_reports.renderer.OUTPUT_DIR", tmp_path):
-                result = render_docx("test.docx", sample_context)
+        result = render_docx("test.docx", sample_context)
         
-        mock_doc.render.assert_called_once_with(sample_context)
+        mock_doc.render.assert_called_once_with(sample_context, jinja_env=_JINJA_ENV)
         mock_doc.save.assert_called_once()
     
-    @patch("client_reports.renderer.DocxTemplate")
-    def test_render_docx_custom_output_name(self, mock_template_class, sample_context, tmp_path):
+    def test_render_docx_custom_output_name(self, mock_doc, sample_context):
         """Test render_docx with custom output filename."""
-        mock_doc = MagicMock()
-        mock_template_class.return_value = mock_doc
-        
-        with patch.object(Path, "mkdir"):
-            with patch("client_reports.renderer.OUTPUT_DIR", tmp_path):
-                result = render_docx("test.docx", sample_context, "custom_output.docx")
+        result = render_docx("test.docx", sample_context, "custom_output.docx")
         
         assert result.name == "custom_output.docx"
     
-    @patch("client_reports.renderer.DocxTemplate")
-    def test_render_docx_default_output_name(self, mock_template_class, sample_context, tmp_path):
+    def test_render_docx_default_output_name(self, mock_doc, sample_context):
         """Test render_docx generates default output filename."""
-        mock_doc = MagicMock()
-        mock_template_class.return_value = mock_doc
-        
-        with patch.object(Path, "mkdir"):
-            with patch("client_reports.renderer.OUTPUT_DIR", tmp_path):
-                result = render_docx("sample_report.docx", sample_context)
+        result = render_docx("sample_report.docx", sample_context)
         
         assert result.name == "sample_report_rendered.docx"
+    
+    def test_output_dir_created_once(self, mock_doc, sample_context):
+        """Test OUTPUT_DIR is created on the first render only."""
+        render_docx("test.docx", sample_context)
+        render_docx("test.docx", sample_context)
+        
+        assert Path.mkdir.call_count == 1
+    
+    def test_incremental_render_applies_partials(self, mock_doc):
+        """Test partial contexts are merged and rendered with a single save."""
+        renderer = IncrementalRenderer("test.docx", {"client_name": "X"})
+        renderer.update({"metrics": _SAMPLE_CONTEXT["metrics"]})
+        renderer.update({"client_name": "Y"})
+        mock_doc.render.assert_not_called()
+        
+        result = renderer.finalize("incremental.docx")
+        
+        mock_doc.render.assert_called_once_with(
+            {"client_name": "Y", "metrics": _SAMPLE_CONTEXT["metrics"]}, jinja_env=_JINJA_ENV
+        )
+        mock_doc.save.assert_called_once()
+        assert result.name == "incremental.docx"
+    
+    def test_render_docx_uses_single_write(self, monkeypatch, mock_doc, sample_context):
+        """Test the rendered document is saved to memory and written in one call."""
+        mock_doc.save.side_effect = lambda buf: buf.write(b"PK\x03\x04 rendered")
+        mock_write = MagicMock()
+        monkeypatch.setattr(Path, "write_bytes", mock_write)
+        
+        render_docx("test.docx", sample_context)
+        
+        mock_write.assert_called_once()
+        data = mock_write.call_args[0][0]
+        assert isinstance(data, bytes)
+        assert data[:2] == b"PK"
+    
+    def test_template_is_cached(self, monkeypatch, mock_template_class, sample_context):
+        """Test the template is read and parsed once across renders."""
+        mock_read = MagicMock(return_value=b"PK")
+        monkeypatch.setattr(Path, "read_bytes", mock_read)
+        
+        render_docx("test.docx", sample_context)
+        render_docx("test.docx", sample_context)
+        
+        assert mock_read.call_count == 1
+        assert mock_template_class.call_count == 1
+
+
+class TestTemplateCopies:
+    """Tests rendering copies of a cached template."""
+    
+    def test_renders_do_not_touch_prototype(self, tmp_path):
+        """Test repeat renders of the real sample template start from a clean copy."""
+        from docx import Document
+        
+        data_file = _DATA / "sample_client.json"
+        context = loads(data_file.read_bytes())
+        
+        _load_template.cache_clear()
+        with patch("client_reports.renderer.OUTPUT_DIR", tmp_path):
+            first = render_docx("sample_report.docx", {**context, "client_name": "First Corp"}, "first.docx")
+            second = render_docx("sample_report.docx", {**context, "client_name": "Second Corp"}, "second.docx")
+        
+        assert "First Corp" in [p.text for p in Document(first).paragraphs]
+        assert "Second Corp" in [p.text for p in Document(second).paragraphs]
+        assert _load_template.cache_info().currsize == 1
+
+
+class TestJinjaEnvironment:
+    """Tests for the shared Jinja environment."""
+    
+    def test_identical_sources_compile_once(self):
+        """Test that compiled templates are reused for identical sources."""
+        source = "Hello {{ client_name }}"
+        first = _JINJA_ENV.from_string(source)
+        second = _JINJA_ENV.from_string("Hello {{ client_name }}")
+        
+        assert first is second
+        assert first.render(client_name="Test Corp") == "Hello Test Corp"
+    
+    def test_warm_templates_skips_broken_files(self, tmp_path):
+        """Test that unreadable templates and lock files do not abort warm-up."""
+        shutil.copy(TEMPLATE_DIR / "sample_report.docx", tmp_path / "sample_report.docx")
+        (tmp_path / "broken.docx").write_bytes(b"not a zip")
+        (tmp_path / "~$sample_report.docx").write_bytes(b"lock")
+        
+        _load_template.cache_clear()
+        with patch("client_reports.renderer.TEMPLATE_DIR", tmp_path):
+            warm_templates()
+        
+        assert _load_template.cache_info().currsize == 1
+
+
+class TestWriteOutput:
+    """Tests for writing rendered output to disk."""
+    
+    def test_recreates_removed_output_dir(self, tmp_path):
+        """Test a directory deleted after _ensure_dir is recreated on the next write."""
+        out_dir = tmp_path / "output"
+        with patch("client_reports.renderer._DIR_READY", set()):
+            _ensure_dir(out_dir)
+            out_dir.rmdir()
+            
+            _write_output(out_dir / "report.docx", b"PK data")
+        
+        assert (out_dir / "report.docx").read_bytes() == b"PK data"
+    
+    def test_small_output(self, tmp_path):
+        """Test small outputs are written as-is."""
+        path = tmp_path / "small.docx"
+        _write_output(path, b"PK small")
+        assert path.read_bytes() == b"PK small"
+    
+    def test_large_output_round_trips(self, tmp_path):
+        """Test large outputs keep their exact size and content."""
+        data = bytes(range(256)) * (DIRECT_IO_THRESHOLD // 256 + 7)
+        path = tmp_path / "large.docx"
+        _write_output(path, data)
+        assert path.read_bytes() == data
 
 
 class TestSampleData:
@@ -96,11 +241,10 @@ class TestSampleData:
     
     def test_sample_client_json_is_valid(self):
         """Verify sample_client.json is valid JSON."""
-        data_file = Path(__file__).resolve().parents[1] / "data" / "sample_client.json"
+        data_file = _DATA / "sample_client.json"
         
         if data_file.exists():
-            with open(data_file, "r") as f:
-                data = json.load(f)
+            data = loads(data_file.read_bytes())
             
             assert "client_name" in data
             assert "metrics" in data